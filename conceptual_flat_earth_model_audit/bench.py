@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Scaling benchmarks for the audit generators and geometry kernels, with a stored baseline."""
+from __future__ import annotations
+
+import argparse
+import gc
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+import generate_3d_dome_visual as dome
+import generate_visuals
+import mismatch_engine as engine
+
+ROOT = Path(__file__).resolve().parent
+BENCH_ENRICH = ROOT / "bench_enrich.mjs"
+BASELINE = ROOT / "bench-baseline.json"
+SIZES = [10, 100, 1_000, 10_000, 100_000]
+# Differences below this many seconds are timer noise, whatever the ratio.
+NOISE_FLOOR_S = 0.005
+
+
+def synthetic_data(n: int, seed: int = 0) -> dict:
+    """``n`` objects in the pipeline-sample-data.json schema around the sample observer.
+
+    Directions are uniform on the sphere; every tenth object is a solar-system
+    body (ecliptic vault height off a synthetic Sun), the rest are stars.
+    """
+    sample = json.loads((ROOT / "pipeline-sample-data.json").read_text())
+    rng = np.random.default_rng(seed)
+    ra = rng.uniform(0, 360, n)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+    ids = ["sun" if i == 0 else f"body{i}" if i % 10 == 0 else f"star:s{i}" for i in range(n)]
+    vault_z = engine.vault_z_for_ids(ids, ra, dec)
+    obs = sample["observer"]
+    r = {k: v[:, 0] for k, v in engine.evaluate(ra, dec, vault_z, [obs["latDeg"]], [obs["lonDeg"]], sample["gmstDeg"]).items()}
+
+    def rnd(x) -> float | None:
+        return None if np.isnan(x) else round(float(x), 6)
+
+    bodies = []
+    for i, body_id in enumerate(ids):
+        star = body_id.startswith("star:")
+        bodies.append({
+            "id": body_id, "label": "Sun" if i == 0 else body_id.split(":")[-1].upper(),
+            "category": "star" if star else "body",
+            "raDeg": rnd(ra[i]), "decDeg": rnd(dec[i]),
+            "vaultCoord": [rnd(x) for x in r["vaultCoord"][i]],
+            "opticalAngles": {"azimuth": rnd(r["opticalAzDeg"][i]), "elevation": rnd(r["opticalElDeg"][i])},
+            "opticalLocalGlobe": None,
+            "vaultZ": rnd(vault_z[i]),
+            "opticalAzDeg": rnd(r["opticalAzDeg"][i]), "opticalElDeg": rnd(r["opticalElDeg"][i]),
+            "lineToVaultAzDeg": rnd(r["lineToVaultAzDeg"][i]), "lineToVaultElDeg": rnd(r["lineToVaultElDeg"][i]),
+            "separationDeg": rnd(r["separationDeg"][i]),
+            "feLineAngles": {"azimuth": rnd(r["lineToVaultAzDeg"][i]), "elevation": rnd(r["lineToVaultElDeg"][i])},
+            "rayAtVaultZ": [rnd(x) for x in r["rayAtVaultZ"][i]],
+            "rayMode": "below-horizon" if r["belowHorizon"][i] else "above-horizon",
+            "missDistance": rnd(r["missDistance"][i]),
+        })
+    return {**{k: v for k, v in sample.items() if k != "bodies"}, "generatedFrom": "bench.py synthetic", "bodies": bodies}
+
+
+def measure(fn, repeat: int) -> tuple[float, int, object]:
+    """Best-of-``repeat`` wall time, then one traced run for peak Python heap."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def dome_geometry(data: dict) -> list:
+    obs = tuple(data["observerFeCoord"])
+    return [(dome.optical_point_for(b, data), dome.clip_ray_to_scene(obs, tuple(b["rayAtVaultZ"]))) for b in data["bodies"]]
+
+
+def render_text(render, name: str, data: dict) -> str:
+    buf = io.StringIO()
+    render(name, data, buf)
+    return buf.getvalue()
+
+
+def node_enrich(data: dict) -> dict:
+    raw = [{k: b[k] for k in ("id", "label", "category", "raDeg", "decDeg", "vaultCoord", "opticalAngles", "opticalLocalGlobe")}
+           for b in data["bodies"]]
+    proc = subprocess.run(["node", str(BENCH_ENRICH)], cwd=ROOT, input=json.dumps(raw).encode(), capture_output=True, check=True)
+    return json.loads(proc.stdout)
+
+
+def bench_size(n: int, tmp: Path, node: bool) -> list[dict]:
+    data = synthetic_data(n)
+    repeat = 5 if n <= 1_000 else 3 if n <= 10_000 else 1
+    data_path = tmp / "data.json"
+    data_path.write_text(json.dumps(data))
+    rows = []
+
+    def record(stage: str, seconds: float, peak: int | None, output_bytes: int | None) -> None:
+        rows.append({"stage": stage, "n": n, "seconds": seconds, "objectsPerSec": n / seconds if seconds else None,
+                     "peakBytes": peak, "outputBytes": output_bytes})
+        print(f"{stage:<18} n={n:<7} {seconds * 1e3:10.2f} ms", flush=True)
+
+    s, peak, loaded = measure(lambda: json.loads(data_path.read_text()), repeat)
+    record("load", s, peak, data_path.stat().st_size)
+    inputs = engine.sample_inputs(loaded)
+    s, peak, _ = measure(lambda: engine.evaluate(**inputs), repeat)
+    record("geometry:engine", s, peak, None)
+    s, peak, _ = measure(lambda: dome_geometry(loaded), repeat)
+    record("geometry:dome", s, peak, None)
+    outputs = {}
+    for stage, module, name in [("svg:dome", dome, "dome-ray-mismatch-3d.svg"),
+                                ("svg:mismatch", generate_visuals, "coordinate-mismatch.svg")]:
+        s, peak, text = measure(lambda: render_text(module.render, name, loaded), repeat)
+        outputs[stage] = text
+        record(stage, s, peak, len(text.encode()))
+    for stage, text in outputs.items():
+        out = tmp / f"{stage.split(':')[1]}.svg"
+        s, peak, _ = measure(lambda: out.write_text(text, encoding="utf-8"), repeat)
+        record(f"write:{stage.split(':')[1]}", s, peak, out.stat().st_size)
+    if node:
+        best = None
+        for _ in range(repeat):
+            result = node_enrich(loaded)
+            if best is None or result["seconds"] < best["seconds"]:
+                best = result
+        record("node:enrich", best["seconds"], best["peakRssBytes"], best["outputBytes"])
+    return rows
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    """Human-readable regressions: stages slower than the baseline by more than ``threshold``."""
+    base = {(r["stage"], r["n"]): r["seconds"] for r in baseline}
+    out = []
+    for r in results:
+        ref = base.get((r["stage"], r["n"]))
+        if ref and r["seconds"] > ref * (1 + threshold) and r["seconds"] - ref > NOISE_FLOOR_S:
+            out.append(f'{r["stage"]} n={r["n"]}: {r["seconds"] * 1e3:.2f} ms vs {ref * 1e3:.2f} ms baseline (+{r["seconds"] / ref - 1:.0%})')
+    return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--sizes", type=int, nargs="*", default=SIZES, help="object counts to benchmark")
+    p.add_argument("--out", type=Path, default=ROOT / ".cache" / "bench-latest.json", help="where to write this run's JSON")
+    p.add_argument("--baseline", type=Path, default=BASELINE)
+    p.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before a stage counts as a regression")
+    p.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    p.add_argument("--no-node", action="store_true", help="skip the Node enrich() stage")
+    args = p.parse_args()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            results.extend(bench_size(n, Path(tmp), not args.no_node))
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(), "numpy": np.__version__,
+            "platform": platform.platform(), "processor": platform.machine(),
+        },
+        "results": results,
+    }
+    args.out.parent.mkdir(exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"wrote {args.out}")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"updated {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; rerun with --update-baseline to store one")
+        return
+    regressions = compare(results, json.loads(args.baseline.read_text())["results"], args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print(f"no regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
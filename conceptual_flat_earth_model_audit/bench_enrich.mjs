@@ -0,0 +1,22 @@
+// Time enrich() over synthetic entries for bench.py.
+//
+// Reads a JSON array of raw entries (raDeg, decDeg, vaultCoord, opticalAngles,
+// opticalLocalGlobe) on stdin, enriches them against one default FeModel and
+// prints {count, seconds, outputBytes, peakRssBytes}. Model construction and
+// JSON parsing are outside the timed region.
+import fs from 'node:fs';
+import { FeModel } from './source/js/core/app.js';
+import { enrich } from './enrich.mjs';
+
+const raw = JSON.parse(fs.readFileSync(0, 'utf8'));
+const model = new FeModel();
+model.update();
+const t0 = performance.now();
+const entries = raw.map((entry) => enrich(model, entry));
+const seconds = (performance.now() - t0) / 1000;
+process.stdout.write(JSON.stringify({
+  count: entries.length,
+  seconds,
+  outputBytes: Buffer.byteLength(JSON.stringify(entries)),
+  peakRssBytes: process.resourceUsage().maxRSS * 1024,
+}));
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Incrementally rebuild the visuals: only figures whose inputs changed are rendered."""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from figure import Figure
+
+ROOT = Path(__file__).resolve().parent
+VIS = ROOT / "visuals"
+MANIFEST = ROOT / ".cache" / "build-manifest.json"
+# Modules exposing FIGURES (name -> figure.Figure) and render(name, data, out).
+GENERATORS = ["generate_visuals", "generate_3d_dome_visual", "observer_grid", "observations"]
+IMPORT_RE = re.compile(r"^\s*(?:from\s+(\w+)\s+import|import\s+(\w+))", re.M)
+
+
+def module_sources(module: str) -> list[Path]:
+    """A generator's source plus every local module it imports, recursively."""
+    seen: dict[Path, None] = {}
+    stack = [module]
+    while stack:
+        path = ROOT / f"{stack.pop()}.py"
+        if path in seen or not path.exists():
+            continue
+        seen[path] = None
+        stack.extend(a or b for a, b in IMPORT_RE.findall(path.read_text()))
+    return sorted(seen)
+
+
+def data_slice(data: dict, keys: tuple[str, ...], fields: tuple[str, ...]) -> dict:
+    """The part of the snapshot a figure reads; edits elsewhere do not invalidate it."""
+    out = {key: data[key] for key in keys}
+    if fields:
+        out["bodies"] = [{f: b.get(f) for f in fields} for b in data["bodies"]]
+    return out
+
+
+def figure_hash(module: str, data: dict, figure: Figure) -> str:
+    h = hashlib.sha256()
+    for path in module_sources(module):
+        h.update(path.name.encode())
+        h.update(path.read_bytes())
+    h.update(json.dumps(data_slice(data, figure.keys, figure.fields), sort_keys=True).encode())
+    if figure.inputs:
+        h.update(figure.inputs().encode())
+    return h.hexdigest()[:16]
+
+
+def figures() -> dict[str, str]:
+    """Output name -> generator module name."""
+    out = {}
+    for module in GENERATORS:
+        for name in importlib.import_module(module).FIGURES:
+            out[name] = module
+    return out
+
+
+def _render(module: str, name: str, data_path: str) -> str:
+    """Worker: render one figure to a temp file and move it into place."""
+    data = json.loads(Path(data_path).read_text())
+    path = VIS / name
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        importlib.import_module(module).render(name, data, fh)
+    os.replace(tmp, path)
+    return name
+
+
+def build(data_path: Path, only: list[str] | None = None, force: bool = False, jobs: int | None = None) -> list[str]:
+    """Render stale figures in parallel and return their names.
+
+    A figure is stale when its output is missing or when the hash of its
+    generator sources, the slice of the snapshot it reads and its declared
+    extra inputs differs from the one recorded in the manifest.
+    """
+    data = json.loads(data_path.read_text())
+    targets = figures()
+    if only:
+        unknown = sorted(set(only) - targets.keys())
+        if unknown:
+            raise SystemExit(f"unknown figure(s): {', '.join(unknown)}")
+        targets = {name: targets[name] for name in only}
+    manifest = json.loads(MANIFEST.read_text()) if MANIFEST.exists() else {}
+    hashes, stale = {}, []
+    for name, module in targets.items():
+        figure = importlib.import_module(module).FIGURES[name]
+        hashes[name] = figure_hash(module, data, figure)
+        if force or manifest.get(name) != hashes[name] or not (VIS / name).exists():
+            stale.append(name)
+    if stale:
+        VIS.mkdir(exist_ok=True)
+        with ProcessPoolExecutor(max_workers=min(len(stale), jobs or os.cpu_count() or 1)) as pool:
+            for job in [pool.submit(_render, targets[name], name, str(data_path)) for name in stale]:
+                name = job.result()
+                manifest[name] = hashes[name]
+                print(f"built {(VIS / name).relative_to(ROOT)}", flush=True)
+    MANIFEST.parent.mkdir(exist_ok=True)
+    tmp = MANIFEST.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    os.replace(tmp, MANIFEST)
+    print(f"{len(stale)} built, {len(targets) - len(stale)} up to date")
+    return stale
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("figures", nargs="*", help="output names to consider (default: all)")
+    p.add_argument("--data", type=Path, default=ROOT / "pipeline-sample-data.json")
+    p.add_argument("--force", action="store_true", help="render even if nothing changed")
+    p.add_argument("--jobs", type=int, default=None, help="process count (default: all cores)")
+    args = p.parse_args()
+    build(args.data, args.figures, args.force, args.jobs)
+
+
+if __name__ == "__main__":
+    main()
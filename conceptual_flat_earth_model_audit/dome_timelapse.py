@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Render the 3D dome scene as an SVG frame sequence from a sweep written by sweep.py."""
+from __future__ import annotations
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+import mismatch_engine as engine
+from generate_3d_dome_visual import static_layers, write_frame
+from sweep import open_sweep
+
+ROOT = Path(__file__).resolve().parent
+
+# Per-worker state, filled once by _init_worker.
+_params: dict = {}
+_columns: dict[str, np.ndarray] = {}
+_layers: tuple[str, str, str] = ("", "", "")
+_out_dir = Path()
+
+
+def label_for(object_id: str) -> str:
+    name = object_id.split(":", 1)[-1]
+    return name[:1].upper() + name[1:]
+
+
+def frame_bodies(params: dict, columns: dict[str, np.ndarray], rows: slice) -> list[list[dict]]:
+    """Scene body entries for the sweep rows selected by ``rows``, shaped like pipeline-sample-data.json bodies."""
+    ids = params["ids"]
+    gmst = np.asarray(columns["gmstDeg"][rows])
+    ra = np.asarray(columns["raDeg"][rows], dtype=np.float64)
+    dec = np.asarray(columns["decDeg"][rows], dtype=np.float64)
+    vault = engine.vault_coord(ra, dec, gmst[:, None], np.asarray(columns["vaultZ"][rows], dtype=np.float64))
+    ray = np.asarray(columns["rayAtVaultZ"][rows], dtype=np.float64)
+    az = np.asarray(columns["opticalAzDeg"][rows], dtype=np.float64)
+    el = np.asarray(columns["opticalElDeg"][rows], dtype=np.float64)
+    miss = np.asarray(columns["missDistance"][rows], dtype=np.float64)
+    below = np.asarray(columns["belowHorizon"][rows])
+    labels = [label_for(i) for i in ids]
+    categories = ["star" if i.startswith("star:") else "body" for i in ids]
+    return [
+        [
+            {
+                "label": labels[k], "category": categories[k],
+                "vaultCoord": vault[r, k].tolist(), "rayAtVaultZ": ray[r, k].tolist(),
+                "opticalAzDeg": float(az[r, k]), "opticalElDeg": float(el[r, k]),
+                "rayMode": "below-horizon" if below[r, k] else "above-horizon",
+                "missDistance": float(miss[r, k]),
+            }
+            for k in range(len(ids))
+        ]
+        for r in range(len(gmst))
+    ]
+
+
+def _init_worker(sweep_dir: str, out_dir: str) -> None:
+    global _params, _columns, _layers, _out_dir
+    index, _columns = open_sweep(Path(sweep_dir))
+    _params = index["params"]
+    obs = _params["observer"]
+    _layers = static_layers(tuple(engine.observer_fe_coord(obs["latDeg"], obs["lonDeg"]).tolist()))
+    _out_dir = Path(out_dir)
+
+
+def _render_batch(rows: list[int], first_frame: int, stride: int) -> int:
+    """Worker: write one frame per sweep row (``stride`` apart), numbered from ``first_frame``."""
+    obs = _params["observer"]
+    obs_fe = engine.observer_fe_coord(obs["latDeg"], obs["lonDeg"]).tolist()
+    # Rows in a batch are evenly strided, so one strided slice reads exactly the frames' rows.
+    bodies = frame_bodies(_params, _columns, slice(rows[0], rows[-1] + 1, stride))
+    for n, row in enumerate(rows):
+        ms = _params["startMs"] + row * _params["stepMs"]
+        data = {
+            "observer": obs, "observerFeCoord": obs_fe, "bodies": bodies[n],
+            "dateIso": datetime.fromtimestamp(ms / 1000, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+        }
+        with open(_out_dir / f"frame_{first_frame + n:05d}.svg", "w", encoding="utf-8") as fh:
+            write_frame(fh, data, _layers)
+    return len(rows)
+
+
+def render_frames(sweep_dir: Path, out_dir: Path, stride: int = 1, limit: int | None = None,
+                  workers: int | None = None, batch: int = 64) -> int:
+    """Write every ``stride``-th finished sweep row as a frame, batches spread over a process pool.
+
+    Each worker opens the sweep's memory maps and renders the static layers
+    once; a frame then only formats the rays, markers and labels that move.
+    """
+    index, _ = open_sweep(sweep_dir)
+    rows = list(range(0, index["rowsDone"], stride))[:limit]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(sweep_dir), str(out_dir))) as pool:
+        jobs = [pool.submit(_render_batch, rows[b:b + batch], b, stride) for b in range(0, len(rows), batch)]
+        for job in jobs:
+            job.result()
+    return len(rows)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--sweep", type=Path, default=ROOT / "sweeps" / "default", help="directory written by sweep.py")
+    p.add_argument("--out", type=Path, default=ROOT / "frames", help="frame_NNNNN.svg output directory")
+    p.add_argument("--stride", type=int, default=1, help="use every Nth sweep step")
+    p.add_argument("--limit", type=int, default=None, help="stop after this many frames")
+    p.add_argument("--workers", type=int, default=None, help="process count (default: all cores)")
+    p.add_argument("--batch", type=int, default=64, help="frames per pool task")
+    args = p.parse_args()
+    count = render_frames(args.sweep, args.out, args.stride, args.limit, args.workers, args.batch)
+    print(f"{args.out}: {count} frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+// Batch RA/Dec evaluation for the sweep tools.
+//
+// Loads only the ephemeris and cel-nav star modules (not the full app graph)
+// and writes little-endian float64 rows to stdout, one row per date:
+//   [gmstDeg, ra0Deg, dec0Deg, ra1Deg, dec1Deg, ...]
+// Ids use the generate_sample_data.mjs convention (`sun`, `mars`,
+// `star:sirius`). Stars get the app's StarTrepidation apparent-of-date
+// corrections.
+//
+//   node ephemeris_batch.mjs --start-ms 1778197797784 --step-ms 60000 --count 4096 --ids sun,moon,star:vega
+import { bodyRADec, greenwichSiderealDeg } from './source/js/core/ephemeris.js';
+import { apparentStarPosition } from './source/js/core/ephemerisCommon.js';
+import { celNavStarById } from './source/js/core/celnavStars.js';
+
+const STAR_OPTS = { precession: true, nutation: true, aberration: true };
+const TO_DEG = 180 / Math.PI;
+
+function arg(name, fallback = null) {
+  const i = process.argv.indexOf(name);
+  return i >= 0 ? process.argv[i + 1] : fallback;
+}
+
+const startMs = Number(arg('--start-ms'));
+const stepMs = Number(arg('--step-ms', '60000'));
+const count = Number(arg('--count', '1'));
+const ids = String(arg('--ids', 'sun')).split(',');
+if (!Number.isFinite(startMs) || !Number.isFinite(stepMs) || !(count > 0)) {
+  console.error('usage: node ephemeris_batch.mjs --start-ms MS --step-ms MS --count N --ids a,b,...');
+  process.exit(2);
+}
+const stars = ids.map((id) => {
+  if (!id.startsWith('star:')) return null;
+  const s = celNavStarById(id.slice(5));
+  if (!s) throw new Error(`unknown star id ${id}`);
+  return s;
+});
+
+const width = 1 + 2 * ids.length;
+const row = new Float64Array(width);
+const out = Buffer.alloc(count * width * 8);
+for (let i = 0; i < count; i++) {
+  const date = new Date(startMs + i * stepMs);
+  row[0] = greenwichSiderealDeg(date);
+  for (let j = 0; j < ids.length; j++) {
+    const star = stars[j];
+    const eq = star
+      ? apparentStarPosition((star.raH / 24) * 2 * Math.PI, star.decD * Math.PI / 180, date, STAR_OPTS)
+      : bodyRADec(ids[j], date);
+    row[1 + 2 * j] = eq.ra * TO_DEG;
+    row[2 + 2 * j] = eq.dec * TO_DEG;
+  }
+  for (let k = 0; k < width; k++) out.writeDoubleLE(row[k], (i * width + k) * 8);
+}
+process.stdout.write(out);
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Pool of long-lived Node FeModel workers for batch reference snapshots and cross-checks."""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import struct
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+import mismatch_engine as engine
+from sweep import parse_utc_ms
+
+ROOT = Path(__file__).resolve().parent
+FE_WORKER = ROOT / "fe_worker.mjs"
+HEADER = struct.Struct("<I")
+
+
+class WorkerError(RuntimeError):
+    """A worker reported an exception or exited mid-request."""
+
+
+class _Worker:
+    def __init__(self):
+        self.proc = subprocess.Popen(["node", str(FE_WORKER)], cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self._next_id = 0
+
+    def _read(self) -> dict:
+        header = self.proc.stdout.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise WorkerError(f"fe_worker exited with code {self.proc.wait()}")
+        (size,) = HEADER.unpack(header)
+        return json.loads(self.proc.stdout.read(size))
+
+    def wait_ready(self) -> None:
+        if not self._read().get("ready"):
+            raise WorkerError("fe_worker did not report ready")
+
+    def call(self, items: list[dict]) -> list[dict]:
+        self._next_id += 1
+        payload = json.dumps({"id": self._next_id, "items": items}, separators=(",", ":")).encode()
+        self.proc.stdin.write(HEADER.pack(len(payload)) + payload)
+        self.proc.stdin.flush()
+        reply = self._read()
+        if reply["id"] != self._next_id:
+            raise WorkerError(f"reply {reply['id']} out of sequence (expected {self._next_id})")
+        if "error" in reply:
+            raise WorkerError(reply["error"])
+        return reply["results"]
+
+    def close(self) -> None:
+        self.proc.stdin.close()
+        self.proc.wait()
+
+    def kill(self) -> None:
+        self.proc.kill()
+        self.proc.wait()
+        self.proc.stdin.close()
+        self.proc.stdout.close()
+
+
+class FeWorkerPool:
+    """``workers`` Node processes that each import the app's FeModel once.
+
+    Items are dicts with any of ``dateMs``/``dateIso``, ``observer``
+    (``{"latDeg", "lonDeg"}``), ``state`` (FeModel state overrides) and
+    ``ids``; each comes back as an enriched snapshot in the
+    pipeline-sample-data.json layout. Use as a context manager.
+    """
+
+    def __init__(self, workers: int | None = None):
+        # Start every process first so their module loads overlap, then wait for each.
+        self._workers: list[_Worker] = []
+        try:
+            for _ in range(workers or os.cpu_count() or 1):
+                self._workers.append(_Worker())
+            for w in self._workers:
+                w.wait_ready()
+        except BaseException:
+            # Do not leave the other Node processes running behind a failed start.
+            for w in self._workers:
+                w.kill()
+            raise
+
+    def __enter__(self) -> FeWorkerPool:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for w in self._workers:
+            w.close()
+
+    def evaluate(self, items: Iterable[dict], batch: int = 64) -> list[dict]:
+        """Snapshots for ``items`` in order; batches are spread over the workers."""
+        items = list(items)
+        batches: queue.Queue = queue.Queue()
+        for lo in range(0, len(items), batch):
+            batches.put(lo)
+        results: list[dict | None] = [None] * len(items)
+        errors: list[BaseException] = []
+
+        def drain(worker: _Worker) -> None:
+            while not errors:
+                try:
+                    lo = batches.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    results[lo:lo + batch] = worker.call(items[lo:lo + batch])
+                except BaseException as exc:
+                    errors.append(exc)
+
+        threads = [threading.Thread(target=drain, args=(w,)) for w in self._workers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+        return results
+
+
+def cross_check(snapshots: list[dict]) -> dict[str, float]:
+    """Worst-case |Python port - FeModel| per field over many snapshots.
+
+    Rays that leave just above the horizon reach the vault thousands of disc
+    radii away, so ``missDistance`` and ``rayAtVaultZ`` are compared relative
+    to their magnitude (absolute below 1).
+    """
+    worst: dict[str, float] = {}
+    for snap in snapshots:
+        result = engine.evaluate(**engine.sample_inputs(snap))
+        errors = engine.max_abs_error(snap, result)
+        miss = np.array([np.nan if b["missDistance"] is None else b["missDistance"] for b in snap["bodies"]])
+        errors["missDistance"] = float(np.nanmax(np.abs(result["missDistance"][:, 0] - miss) / np.maximum(1, miss), initial=0))
+        ray = np.array([b["rayAtVaultZ"] for b in snap["bodies"]])
+        scale = np.maximum(1, np.linalg.norm(ray, axis=-1, keepdims=True))
+        errors["rayAtVaultZ"] = float(np.max(np.abs(result["rayAtVaultZ"][:, 0] - ray) / scale))
+        ids = [b["id"] for b in snap["bodies"]]
+        ra = np.array([b["raDeg"] for b in snap["bodies"]])
+        dec = np.array([b["decDeg"] for b in snap["bodies"]])
+        errors["vaultZ"] = float(np.max(np.abs(engine.vault_z_for_ids(ids, ra, dec) - [b["vaultZ"] for b in snap["bodies"]])))
+        ms = parse_utc_ms(snap["dateIso"])
+        gmst = abs(float(engine.gmst_deg(ms)) - snap["gmstDeg"]) % 360
+        errors["gmstDeg"] = min(gmst, 360 - gmst)
+        for key, err in errors.items():
+            worst[key] = max(worst.get(key, 0.0), err)
+    return worst
+
+
+def main() -> None:
+    sample = json.loads((ROOT / "pipeline-sample-data.json").read_text())
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--start", default=sample["dateIso"], help="ISO-8601 UTC first date (default: sample snapshot)")
+    p.add_argument("--step-hours", type=float, default=7.3, help="spacing between dates")
+    p.add_argument("--count", type=int, default=2000, help="number of dates")
+    p.add_argument("--lat", type=float, default=sample["observer"]["latDeg"])
+    p.add_argument("--lon", type=float, default=sample["observer"]["lonDeg"])
+    p.add_argument("--workers", type=int, default=None, help="Node process count (default: all cores)")
+    p.add_argument("--batch", type=int, default=64, help="items per request frame")
+    args = p.parse_args()
+    start_ms = parse_utc_ms(args.start)
+    step_ms = round(args.step_hours * 3_600_000)
+    items = [{"dateMs": start_ms + i * step_ms, "observer": {"latDeg": args.lat, "lonDeg": args.lon}} for i in range(args.count)]
+    t0 = time.perf_counter()
+    with FeWorkerPool(args.workers) as pool:
+        t1 = time.perf_counter()
+        snapshots = pool.evaluate(items, args.batch)
+    t2 = time.perf_counter()
+    print(f"{len(snapshots)} FeModel snapshots in {t2 - t1:.2f} s ({t1 - t0:.2f} s worker start-up)")
+    for key, err in cross_check(snapshots).items():
+        note = " (relative)" if key in ("missDistance", "rayAtVaultZ") else ""
+        print(f"{key}: max |engine - FeModel|{note} = {err:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+// Long-lived FeModel worker driven by fe_pool.py.
+//
+// The app module graph is imported once; after that the worker answers
+// batches over stdin/stdout. Every frame is a 4-byte little-endian length
+// followed by that many bytes of UTF-8 JSON:
+//   request  {"id": 7, "items": [{"dateMs": 1778197797784, "observer": {"latDeg": 32, "lonDeg": -100.8},
+//                                 "state": {"VaultHeight": 0.8}, "ids": ["sun", "star:vega"]}, ...]}
+//   reply    {"id": 7, "results": [snapshot, ...]}  or  {"id": 7, "error": "message"}
+// Once the model is constructed the worker sends {"id": 0, "ready": true}.
+// A snapshot has the pipeline-sample-data.json layout. Each item starts from
+// the model's default state, so results do not depend on batch order; all
+// item keys are optional (dateIso is accepted in place of dateMs).
+import { FeModel } from './source/js/core/app.js';
+import { DEFAULT_IDS, snapshot } from './enrich.mjs';
+
+// stdout carries frames only; route stray app logging to stderr.
+console.log = console.error;
+console.info = console.error;
+
+const EPOCH_MS = Date.UTC(2017, 0, 1);
+const model = new FeModel();
+const baseState = structuredClone(model.state);
+
+function evaluate(item) {
+  const state = { ...structuredClone(baseState), ...(item.state || {}) };
+  const ms = item.dateMs ?? (item.dateIso ? new Date(item.dateIso).getTime() : null);
+  if (ms != null) {
+    // Keep DayOfYear/Time consistent so update()'s date sync keeps DateTime.
+    state.DateTime = (ms - EPOCH_MS) / 86_400_000;
+    state.DayOfYear = Math.floor(state.DateTime);
+    state.Time = (state.DateTime - state.DayOfYear) * 24;
+  }
+  if (item.observer) {
+    state.ObserverLat = item.observer.latDeg;
+    state.ObserverLong = item.observer.lonDeg;
+  }
+  model.state = state;
+  model.update();
+  return snapshot(model, item.ids || DEFAULT_IDS);
+}
+
+function send(message) {
+  const payload = Buffer.from(JSON.stringify(message));
+  const header = Buffer.alloc(4);
+  header.writeUInt32LE(payload.length);
+  process.stdout.write(Buffer.concat([header, payload]));
+}
+
+send({ id: 0, ready: true });
+let pending = Buffer.alloc(0);
+process.stdin.on('data', (chunk) => {
+  pending = pending.length ? Buffer.concat([pending, chunk]) : chunk;
+  while (pending.length >= 4) {
+    const size = pending.readUInt32LE(0);
+    if (pending.length < 4 + size) break;
+    const request = JSON.parse(pending.subarray(4, 4 + size).toString('utf8'));
+    pending = pending.subarray(4 + size);
+    try {
+      send({ id: request.id, results: request.items.map(evaluate) });
+    } catch (err) {
+      send({ id: request.id, error: String(err && err.stack || err) });
+    }
+  }
+});
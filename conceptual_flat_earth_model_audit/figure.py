@@ -0,0 +1,18 @@
+"""Figure metadata shared by build.py and the generators that declare FIGURES."""
+from __future__ import annotations
+
+from typing import Callable, NamedTuple, TextIO
+
+
+class Figure(NamedTuple):
+    """One generated SVG: how to write it and which inputs it reads.
+
+    ``keys`` (top-level data keys) and ``fields`` (per-body fields) are the
+    slice of pipeline-sample-data.json that build.py hashes for staleness.
+    ``inputs``, when set, returns a digest of anything else the figure
+    reads, such as the app sources a dataset is extracted from.
+    """
+    write: Callable[[TextIO, dict], None]
+    keys: tuple[str, ...]
+    fields: tuple[str, ...]
+    inputs: Callable[[], str] | None = None
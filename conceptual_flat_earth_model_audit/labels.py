@@ -0,0 +1,283 @@
+"""Greedy collision-free label placement shared by the SVG generators.
+
+Each label tries eight positions around its anchor, then the same ring
+further out with a leader line back to the anchor, and is dropped when
+every candidate collides. Markers and panels are snapped to a raster and,
+once there are more than a handful, summed into a summed-area table, so
+every candidate of every label is tested against them in one vectorized
+pass; anchors with no free candidate (the bulk of a dense scene) never
+reach the Python loop. Only the few labels actually placed, and their
+leader lines, are kept as boxes in a uniform grid. Labels are placed in
+call order, so callers place the important ones first.
+"""
+from __future__ import annotations
+
+import math
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+Box = tuple[float, float, float, float]
+
+# Candidate directions around the anchor, most preferred first.
+DIRECTIONS = [(1, -1), (1, 1), (-1, -1), (-1, 1), (1, 0), (-1, 0), (0, -1), (0, 1)]
+# Average glyph advance as a fraction of font size, for sans-serif labels.
+CHAR_WIDTH = 0.56
+# Anchors tested against the obstacle raster per vectorized pass.
+CHUNK = 8192
+# Up to this many candidate x obstacle pairs are compared directly instead of building the summed-area table.
+DIRECT_PAIRS = 1 << 16
+
+
+class Label(NamedTuple):
+    x: float
+    y: float
+    text: str
+    leader: tuple[float, float, float, float] | None
+
+
+def text_width(text: str, size: float) -> float:
+    return len(text) * size * CHAR_WIDTH
+
+
+class LabelLayout:
+    """Place text labels inside ``bounds`` without overlapping each other or blocked boxes.
+
+    Register obstacles with ``block``/``block_points`` first, then call
+    ``place``; each label comes back as its text position (``text-anchor``
+    start, baseline y) and an optional leader line, or ``None`` when it was
+    dropped. Obstacle and candidate edges are snapped to the nearest line of
+    a ``res``-pixel raster, so boxes that merely touch do not collide, and a
+    label can overlap a marker's bounding box by less than one raster step.
+    Leader lines are tested with a half-step margin and keep clear of every
+    obstacle except the anchor's own marker (radius up to ``offset``).
+    Labels and leaders never overlap each other.
+    """
+
+    def __init__(self, bounds: Box, *, res: float = 4.0, cell: float = 32.0, offset: float = 7.0,
+                 leader_offsets: tuple[float, ...] = (24.0, 44.0)):
+        self.bounds = bounds
+        self.res = res
+        self.cell = cell
+        self.offset = offset
+        self.leader_offsets = leader_offsets
+        self._nx = math.ceil((bounds[2] - bounds[0]) / res)
+        self._ny = math.ceil((bounds[3] - bounds[1]) / res)
+        self._obstacles: list[np.ndarray] = []
+        self._cells: np.ndarray | None = None
+        self._sat: np.ndarray | None = None
+        self._grid: dict[tuple[int, int], list[Box]] = {}
+
+    def block(self, box: Box) -> None:
+        """Mark a rectangle (x0, y0, x1, y1) as occupied."""
+        self._obstacles.append(np.array([box], dtype=np.float64))
+        self._cells = self._sat = None
+
+    def block_points(self, points: Sequence[tuple[float, float]], r: float) -> None:
+        """Mark markers of radius ``r`` centred on ``points`` as occupied."""
+        xy = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self._obstacles.append(np.concatenate([xy - r, xy + r], axis=1))
+        self._cells = self._sat = None
+
+    def _snap(self, v, axis: int):
+        """Nearest raster line index of coordinate(s) ``v`` along x (0) or y (1), clipped to the bounds."""
+        n = self._ny if axis else self._nx
+        return np.clip(np.rint((v - self.bounds[axis]) / self.res), 0, n).astype(np.intp)
+
+    def _obstacle_cells(self) -> np.ndarray:
+        """(n, 4) raster cell ranges [x0, x1) x [y0, y1) of the obstacles that cover any cell."""
+        if self._cells is None:
+            boxes = np.concatenate(self._obstacles) if self._obstacles else np.empty((0, 4))
+            cells = np.stack([self._snap(boxes[:, 0], 0), self._snap(boxes[:, 1], 1),
+                              self._snap(boxes[:, 2], 0), self._snap(boxes[:, 3], 1)], axis=1)
+            self._cells = cells[(cells[:, 0] < cells[:, 2]) & (cells[:, 1] < cells[:, 3])]
+        return self._cells
+
+    def _summed_area(self) -> np.ndarray:
+        """Summed-area table of obstacle coverage on the ``res`` raster."""
+        nx, ny = self._nx, self._ny
+        size = (ny + 1) * (nx + 1)
+        x0, y0, x1, y1 = self._obstacle_cells().T
+        # 2D difference array: +1 at the top-left and bottom-right corners, -1 at the others.
+        plus = np.bincount(np.concatenate([y0 * (nx + 1) + x0, y1 * (nx + 1) + x1]), minlength=size)
+        minus = np.bincount(np.concatenate([y0 * (nx + 1) + x1, y1 * (nx + 1) + x0]), minlength=size)
+        diff = (plus - minus).astype(np.int32)
+        # Explicit int32 keeps cumsum from widening to int64, which is several times slower.
+        covered = diff.reshape(ny + 1, nx + 1).cumsum(0, dtype=np.int32).cumsum(1, dtype=np.int32)[:ny, :nx] > 0
+        sat = np.zeros((ny + 1, nx + 1), dtype=np.int32)
+        sat[1:, 1:] = covered.cumsum(0, dtype=np.int32).cumsum(1, dtype=np.int32)
+        return sat
+
+    def _covered(self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray,
+                 skip: tuple[np.ndarray, ...] | None = None) -> np.ndarray:
+        """Whether any obstacle covers a cell of [x0, x1) x [y0, y1) outside the cell range ``skip``.
+
+        The index arrays broadcast together; ``skip`` is an (x0, y0, x1, y1) range like them.
+        """
+        cells = self._obstacle_cells()
+        if self._sat is None and x0.size * len(cells) <= DIRECT_PAIRS:
+            # A handful of obstacles: comparing against each is cheaper than building the table.
+            ix0, iy0 = np.maximum(x0[..., None], cells[:, 0]), np.maximum(y0[..., None], cells[:, 1])
+            ix1, iy1 = np.minimum(x1[..., None], cells[:, 2]), np.minimum(y1[..., None], cells[:, 3])
+            overlap = (ix0 < ix1) & (iy0 < iy1)
+            if skip is not None:
+                sx0, sy0, sx1, sy1 = (a[..., None] for a in skip)
+                overlap &= (ix0 < sx0) | (sx1 < ix1) | (iy0 < sy0) | (sy1 < iy1)
+            return overlap.any(axis=-1)
+        if self._sat is None:
+            self._sat = self._summed_area()
+        s = self._sat
+
+        def count(ax0, ay0, ax1, ay1):
+            return s[ay1, ax1] - s[ay0, ax1] - s[ay1, ax0] + s[ay0, ax0]
+
+        total = count(x0, y0, x1, y1)
+        if skip is not None:
+            sx0, sy0, sx1, sy1 = skip
+            ix0, iy0 = np.clip(x0, sx0, sx1), np.clip(y0, sy0, sy1)
+            total = total - count(ix0, iy0, np.clip(x1, ix0, sx1), np.clip(y1, iy0, sy1))
+        return total > 0
+
+    def _slots(self, h: float, leader: bool) -> list[tuple[float, float, float]]:
+        """Candidate slots in preference order: box left = x + shift_x + scale_w * width, top = y + shift_y."""
+        offsets = (self.offset, *self.leader_offsets) if leader else (self.offset,)
+        slots = []
+        for d in offsets:
+            for dx, dy in DIRECTIONS:
+                top = d if dy > 0 else -d - h if dy < 0 else -h / 2
+                if dx and dy:
+                    # Diagonal slots hug the anchor so the label reads as attached to it.
+                    top += -0.5 * d if dy > 0 else 0.5 * d
+                slots.append((dx * d, 0.0 if dx > 0 else -1.0 if dx < 0 else -0.5, top))
+        return slots
+
+    def _clear_of_obstacles(self, x: np.ndarray, y: np.ndarray, w: np.ndarray, h: float,
+                            slots: list[tuple[float, float, float]]) -> np.ndarray:
+        """(labels, slots) mask of candidates inside the bounds and clear of every obstacle."""
+        bx0, by0, bx1, by1 = self.bounds
+        shift_x, scale_w, shift_y = np.array(slots).T
+        clear = np.empty((len(x), len(slots)), dtype=bool)
+        # Anchors go through in chunks so the (chunk, slots) temporaries stay small.
+        for lo in range(0, len(x), CHUNK):
+            cx, cy, cw = x[lo:lo + CHUNK, None], y[lo:lo + CHUNK, None], w[lo:lo + CHUNK, None]
+            left = cx + shift_x + cw * scale_w
+            top = cy + shift_y
+            right, bottom = left + cw, top + h
+            hit = self._covered(self._snap(left, 0), self._snap(top, 1), self._snap(right, 0), self._snap(bottom, 1))
+            clear[lo:lo + CHUNK] = (left >= bx0) & (top >= by0) & (right <= bx1) & (bottom <= by1) & ~hit
+        return clear
+
+    def _clear_leaders(self, x: np.ndarray, y: np.ndarray, w: np.ndarray, h: float,
+                       slots: list[tuple[float, float, float]], clear: np.ndarray) -> np.ndarray:
+        """``clear`` with the leader slots whose leader line crosses an obstacle switched off."""
+        per_ring = len(DIRECTIONS)
+        shift_x, scale_w, shift_y = np.array(slots[per_ring:]).T
+        i, k = np.nonzero(clear[:, per_ring:])
+        clear = clear.copy()
+        if i.size:
+            left, top = x[i] + shift_x[k] + w[i] * scale_w[k], y[i] + shift_y[k]
+            clear[i, k + per_ring] = ~self._leader_hits(x[i], y[i], left, top, left + w[i], top + h)
+        return clear
+
+    def _leader_line(self, x, y, left, top, right, bottom):
+        """Leaders (x0, y0, x1, y1) from anchors (x, y) to label boxes, for floats or arrays alike."""
+        # From one raster step outside the anchor's marker box (half-width ``offset``), where no other
+        # marker snapped into the skipped cells can reach, to the nearest point of the label box.
+        ex, ey = np.clip(x, left, right), np.clip(y, top, bottom)
+        reach = np.maximum(abs(ex - x), abs(ey - y))
+        f = np.minimum(1.0, (self.offset + self.res) / np.maximum(reach, 1e-9))
+        return x + (ex - x) * f, y + (ey - y) * f, ex, ey
+
+    def _pieces(self, x0, y0, x1, y1, steps: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Boxes covering each segment in ``steps`` equal parts, as four (..., steps) arrays."""
+        t = np.linspace(0.0, 1.0, steps + 1)
+        px = np.asarray(x0)[..., None] + np.asarray(x1 - x0)[..., None] * t
+        py = np.asarray(y0)[..., None] + np.asarray(y1 - y0)[..., None] * t
+        return (np.minimum(px[..., :-1], px[..., 1:]), np.minimum(py[..., :-1], py[..., 1:]),
+                np.maximum(px[..., :-1], px[..., 1:]), np.maximum(py[..., :-1], py[..., 1:]))
+
+    def _leader_hits(self, x: np.ndarray, y: np.ndarray, left: np.ndarray, top: np.ndarray,
+                     right: np.ndarray, bottom: np.ndarray) -> np.ndarray:
+        """Whether each leader from (x, y) to its label box crosses an obstacle other than the anchor's marker."""
+        x0, y0, x1, y1 = self._leader_line(x, y, left, top, right, bottom)
+        own = (self._snap(x - self.offset, 0), self._snap(y - self.offset, 1),
+               self._snap(x + self.offset, 0), self._snap(y + self.offset, 1))
+        # The box around the whole leader settles most of them; only the rest are tested piece by piece.
+        hits = self._covered(*self._outer_cells(np.minimum(x0, x1), np.minimum(y0, y1),
+                                                np.maximum(x0, x1), np.maximum(y0, y1)), own)
+        j = np.flatnonzero(hits)
+        if j.size:
+            steps = max(1, math.ceil(float(np.hypot(x1[j] - x0[j], y1[j] - y0[j]).max()) / self.res))
+            pieces = self._outer_cells(*self._pieces(x0[j], y0[j], x1[j], y1[j], steps))
+            hits[j] = self._covered(*pieces, tuple(a[j, None] for a in own)).any(axis=1)
+        return hits
+
+    def _outer_cells(self, x0, y0, x1, y1) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Raster cells of boxes widened by half a step and rounded outward.
+
+        Obstacle edges move by up to half a step when snapped, so this cannot miss a crossing.
+        """
+        bx0, by0 = self.bounds[:2]
+        m = self.res / 2
+        return (np.clip(np.floor((x0 - m - bx0) / self.res), 0, self._nx).astype(np.intp),
+                np.clip(np.floor((y0 - m - by0) / self.res), 0, self._ny).astype(np.intp),
+                np.clip(np.ceil((x1 + m - bx0) / self.res), 0, self._nx).astype(np.intp),
+                np.clip(np.ceil((y1 + m - by0) / self.res), 0, self._ny).astype(np.intp))
+
+    def _clear_of_labels(self, box: Box) -> bool:
+        x0, y0, x1, y1 = box
+        c = self.cell
+        for i in range(int(x0 // c), int(x1 // c) + 1):
+            for j in range(int(y0 // c), int(y1 // c) + 1):
+                for ox0, oy0, ox1, oy1 in self._grid.get((i, j), ()):
+                    if ox0 < x1 and x0 < ox1 and oy0 < y1 and y0 < oy1:
+                        return False
+        return True
+
+    def _add_label_box(self, box: Box) -> None:
+        x0, y0, x1, y1 = box
+        c = self.cell
+        for i in range(int(x0 // c), int(x1 // c) + 1):
+            for j in range(int(y0 // c), int(y1 // c) + 1):
+                self._grid.setdefault((i, j), []).append(box)
+
+    def place(self, anchors: Sequence[tuple[float, float]], texts: Sequence[str], size: float, *,
+              leader: bool = True) -> list[Label | None]:
+        """Put each ``texts[i]`` (font ``size`` px) next to ``anchors[i]`` if any candidate slot is free."""
+        out: list[Label | None] = [None] * len(texts)
+        if not texts:
+            return out
+        xy = np.asarray(anchors, dtype=np.float64).reshape(-1, 2)
+        w = np.array([text_width(t, size) for t in texts])
+        slots = self._slots(size, leader)
+        clear = self._clear_of_obstacles(xy[:, 0], xy[:, 1], w, size, slots)
+        per_ring = len(DIRECTIONS)
+        if leader:
+            clear = self._clear_leaders(xy[:, 0], xy[:, 1], w, size, slots, clear)
+        idx = np.flatnonzero(clear.any(axis=1))
+        for i, (x, y), width, row in zip(idx.tolist(), xy[idx].tolist(), w[idx].tolist(), clear[idx].tolist()):
+            for k, ok in enumerate(row):
+                if not ok:
+                    continue
+                shift_x, scale_w, shift_y = slots[k]
+                left, top = x + shift_x + width * scale_w, y + shift_y
+                box = (left, top, left + width, top + size)
+                if not self._clear_of_labels(box):
+                    continue
+                line, pieces = None, []
+                if k >= per_ring:
+                    line = tuple(map(float, self._leader_line(x, y, *box)))
+                    x0, y0, x1, y1 = line
+                    steps = max(1, math.ceil(math.hypot(x1 - x0, y1 - y0) / self.res))
+                    pieces = list(zip(*(a.tolist() for a in self._pieces(x0, y0, x1, y1, steps))))
+                    # The whole leader's box is a cheap first test; only when it is not clear are its pieces tried.
+                    span = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+                    if not self._clear_of_labels(span) and not all(map(self._clear_of_labels, pieces)):
+                        continue
+                for piece in pieces:
+                    self._add_label_box(piece)
+                self._add_label_box(box)
+                # Baseline sits at about 80% of the em box.
+                out[i] = Label(left, top + 0.8 * size, texts[i], line)
+                break
+        return out
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Vectorised NumPy port of the optical-vs-vault mismatch math in generate_sample_data.mjs."""
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent
+
+# App state defaults (source/js/core/app.js) for the default 'fe' world model.
+STARFIELD_VAULT_HEIGHT = 0.485
+VAULT_HEIGHT = 0.75
+VAULT_SIZE = 1.0
+HEADROOM = 0.06
+SUN_RANGE = 0.20
+SUN_DEC_DEG = 23.44
+ECLIPTIC_HEIGHT_PER_DEG = SUN_RANGE / (2 * SUN_DEC_DEG)
+# enrich() extends below-horizon rays by this fraction of the unit optical vector.
+BELOW_HORIZON_RAY_T = 0.34
+
+
+def gmst_deg(unix_ms) -> np.ndarray:
+    """Greenwich mean sidereal time in degrees (ephemerisCommon.greenwichSiderealDeg)."""
+    d = np.asarray(unix_ms, dtype=np.float64) / 86_400_000 + 2440587.5 - 2451545.0
+    t = d / 36525
+    return np.mod(280.46061837 + 360.98564736629 * d + 0.000387933 * t * t - t ** 3 / 38710000, 360.0)
+
+
+def heavenly_vault_ceiling(lat_deg, dome_size: float = VAULT_SIZE, dome_height: float = VAULT_HEIGHT) -> np.ndarray:
+    rho_sq = (((90 - np.asarray(lat_deg, dtype=np.float64)) / 180) / dome_size) ** 2
+    return np.where(rho_sq >= 1, 0.0, dome_height * np.sqrt(np.clip(1 - rho_sq, 0, None)))
+
+
+def sun_vault_z(dec_deg) -> np.ndarray:
+    """Sun vault height: declination mapped across the body band above the starfield."""
+    dec = np.asarray(dec_deg, dtype=np.float64)
+    norm = 0.5 + 0.5 * np.clip(dec / SUN_DEC_DEG, -1, 1)
+    return np.minimum(heavenly_vault_ceiling(dec), STARFIELD_VAULT_HEIGHT + HEADROOM + norm * SUN_RANGE)
+
+
+def ecliptic_body_vault_z(ra_deg, dec_deg, sun_z) -> np.ndarray:
+    """Moon/planet vault height: the Sun's height offset by ecliptic latitude."""
+    ra = np.radians(np.asarray(ra_deg, dtype=np.float64))
+    dec = np.radians(np.asarray(dec_deg, dtype=np.float64))
+    eps = math.radians(SUN_DEC_DEG)
+    beta = np.degrees(np.arcsin(np.clip(math.cos(eps) * np.sin(dec) - math.sin(eps) * np.cos(dec) * np.sin(ra), -1, 1)))
+    desired = sun_z + beta * ECLIPTIC_HEIGHT_PER_DEG
+    ceil = heavenly_vault_ceiling(np.degrees(dec))
+    return np.maximum(STARFIELD_VAULT_HEIGHT + HEADROOM, np.minimum(ceil, desired))
+
+
+def vault_z_for_ids(ids: list[str], ra_deg, dec_deg) -> np.ndarray:
+    """Vault heights for (..., N) RA/Dec arrays whose last axis follows ``ids``.
+
+    Moon and planet heights key off the Sun's, so ``sun`` must be present
+    whenever a non-star id is.
+    """
+    ra = np.asarray(ra_deg, dtype=np.float64)
+    dec = np.asarray(dec_deg, dtype=np.float64)
+    z = np.full(np.broadcast_shapes(ra.shape, dec.shape), STARFIELD_VAULT_HEIGHT)
+    if all(body_id.startswith("star:") for body_id in ids):
+        return z
+    if "sun" not in ids:
+        raise ValueError("moon/planet vault heights need 'sun' in ids")
+    sun_z = sun_vault_z(dec[..., ids.index("sun")])
+    for j, body_id in enumerate(ids):
+        if body_id == "sun":
+            z[..., j] = sun_z
+        elif not body_id.startswith("star:"):
+            z[..., j] = ecliptic_body_vault_z(ra[..., j], dec[..., j], sun_z)
+    return z
+
+
+def observer_fe_coord(lat_deg, lon_deg) -> np.ndarray:
+    """Observer position on the AE disc, shape (..., 3)."""
+    lat = np.asarray(lat_deg, dtype=np.float64)
+    lon = np.radians(np.asarray(lon_deg, dtype=np.float64))
+    r = (90 - lat) / 180
+    return np.stack(np.broadcast_arrays(r * np.cos(lon), r * np.sin(lon), np.zeros_like(r)), axis=-1)
+
+
+def vault_coord(ra_deg, dec_deg, gmst, vault_z) -> np.ndarray:
+    """Whole-world vault marker: AE projection of (dec, ra - GMST) at height vault_z."""
+    dec = np.asarray(dec_deg, dtype=np.float64)
+    lo = np.radians(np.asarray(ra_deg, dtype=np.float64) - gmst)
+    r = (90 - dec) / 180
+    return np.stack(np.broadcast_arrays(r * np.cos(lo), r * np.sin(lo), vault_z), axis=-1)
+
+
+def optical_local_globe(ra_deg, dec_deg, lat_deg, lon_deg, gmst) -> np.ndarray:
+    """Unit (zenith, east, north) vector from the standard local-sky transform (raDecToAzEl)."""
+    ra = np.radians(np.asarray(ra_deg, dtype=np.float64))
+    dec = np.radians(np.asarray(dec_deg, dtype=np.float64))
+    lat = np.radians(np.asarray(lat_deg, dtype=np.float64))
+    ha = np.radians(gmst + np.asarray(lon_deg, dtype=np.float64)) - ra
+    cos_dec = np.cos(dec)
+    zenith = np.sin(lat) * np.sin(dec) + np.cos(lat) * cos_dec * np.cos(ha)
+    east = -cos_dec * np.sin(ha)
+    north = np.sin(dec) * np.cos(lat) - cos_dec * np.sin(lat) * np.cos(ha)
+    return np.stack(np.broadcast_arrays(zenith, east, north), axis=-1)
+
+
+def local_globe_angles(v: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(azimuth, elevation) in degrees for (..., 3) local-globe vectors (localGlobeCoordToAngles)."""
+    norm = np.linalg.norm(v, axis=-1)
+    az = np.mod(np.degrees(np.arctan2(v[..., 1], v[..., 2])), 360.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        el = np.degrees(np.arcsin(np.clip(v[..., 0] / norm, -1, 1)))
+    return az, el
+
+
+def evaluate(ra_deg, dec_deg, vault_z, obs_lat_deg, obs_lon_deg, gmst) -> dict[str, np.ndarray]:
+    """Evaluate N bodies against M observers in one batched pass.
+
+    ``ra_deg``, ``dec_deg`` and ``vault_z`` have shape (N,), the observer
+    arrays shape (M,). ``gmst`` is a scalar or anything broadcastable to
+    (N, M), so a time sweep can flatten (step, body) into the N axis.
+    Returns arrays of shape (N, M) (or (N, M, 3) for coordinates) keyed by
+    the field names ``enrich()`` writes to pipeline-sample-data.json;
+    ``missDistance`` is NaN where ``belowHorizon`` is set.
+    """
+    ra = np.atleast_1d(np.asarray(ra_deg, dtype=np.float64))[:, None]
+    dec = np.atleast_1d(np.asarray(dec_deg, dtype=np.float64))[:, None]
+    vz = np.broadcast_to(np.asarray(vault_z, dtype=np.float64), ra.shape[:1])[:, None]
+    lat = np.atleast_1d(np.asarray(obs_lat_deg, dtype=np.float64))[None, :]
+    lon = np.atleast_1d(np.asarray(obs_lon_deg, dtype=np.float64))[None, :]
+    gmst = np.asarray(gmst, dtype=np.float64)
+    shape = np.broadcast_shapes(ra.shape, lat.shape, gmst.shape)
+
+    obs = observer_fe_coord(lat, lon)
+    vault = np.broadcast_to(vault_coord(ra, dec, gmst, vz), shape + (3,))
+    optical = np.broadcast_to(optical_local_globe(ra, dec, lat, lon, gmst), shape + (3,))
+    opt_az, opt_el = local_globe_angles(optical)
+
+    # Local-FE (south, east, up) -> global FE is a rotation by the observer longitude.
+    lon_r = np.radians(lon)
+    cl, sl = np.cos(lon_r), np.sin(lon_r)
+    zenith, east, north = optical[..., 0], optical[..., 1], optical[..., 2]
+    dx = -cl * north - sl * east
+    dy = -sl * north + cl * east
+    dz = zenith
+
+    below = ~(dz > 1e-9)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(below, BELOW_HORIZON_RAY_T, (vault[..., 2] - obs[..., 2]) / dz)
+    ray = np.stack([
+        obs[..., 0] + dx * t,
+        obs[..., 1] + dy * t,
+        np.where(below, obs[..., 2] + dz * t, vault[..., 2]),
+    ], axis=-1)
+    miss = np.where(below, np.nan, np.hypot(ray[..., 0] - vault[..., 0], ray[..., 1] - vault[..., 1]))
+
+    # feConceptualLocalGlobeUnit: observer -> vault in local-globe axes.
+    vx, vy, vzz = vault[..., 0] - obs[..., 0], vault[..., 1] - obs[..., 1], vault[..., 2] - obs[..., 2]
+    fe = np.stack([vzz, -sl * vx + cl * vy, -(cl * vx + sl * vy)], axis=-1)
+    length = np.linalg.norm(fe, axis=-1, keepdims=True)
+    fe = np.divide(fe, length, out=np.zeros_like(fe), where=length >= 1e-12)
+    line_az, line_el = local_globe_angles(fe)
+    sep = np.degrees(np.arccos(np.clip(np.einsum("...i,...i->...", optical, fe), -1, 1)))
+
+    return {
+        "vaultCoord": vault,
+        "opticalAzDeg": opt_az,
+        "opticalElDeg": opt_el,
+        "lineToVaultAzDeg": line_az,
+        "lineToVaultElDeg": line_el,
+        "separationDeg": sep,
+        "rayAtVaultZ": ray,
+        "belowHorizon": below,
+        "missDistance": miss,
+    }
+
+
+def sample_inputs(data: dict) -> dict[str, np.ndarray]:
+    """Pull engine inputs out of a pipeline-sample-data.json document."""
+    bodies = data["bodies"]
+    return {
+        "ra_deg": np.array([b["raDeg"] for b in bodies]),
+        "dec_deg": np.array([b["decDeg"] for b in bodies]),
+        "vault_z": np.array([b["vaultZ"] for b in bodies]),
+        "obs_lat_deg": np.array([data["observer"]["latDeg"]]),
+        "obs_lon_deg": np.array([data["observer"]["lonDeg"]]),
+        "gmst": data["gmstDeg"],
+    }
+
+
+def max_abs_error(data: dict, result: dict[str, np.ndarray]) -> dict[str, float]:
+    """Largest deviation from the Node-generated snapshot for each scalar field."""
+    out = {}
+    for key in ("opticalAzDeg", "opticalElDeg", "lineToVaultAzDeg", "lineToVaultElDeg", "separationDeg", "missDistance"):
+        ref = np.array([np.nan if b[key] is None else b[key] for b in data["bodies"]])
+        got = result[key][:, 0]
+        diff = np.abs(got - ref)
+        if key.endswith("AzDeg"):
+            diff = np.minimum(diff, 360 - diff)
+        out[key] = float(np.nanmax(diff))
+    ref_ray = np.array([b["rayAtVaultZ"] for b in data["bodies"]])
+    out["rayAtVaultZ"] = float(np.max(np.abs(result["rayAtVaultZ"][:, 0] - ref_ray)))
+    return out
+
+
+if __name__ == "__main__":
+    data = json.loads((ROOT / "pipeline-sample-data.json").read_text())
+    result = evaluate(**sample_inputs(data))
+    for key, err in max_abs_error(data, result).items():
+        print(f"{key}: max |engine - snapshot| = {err:.2e}")
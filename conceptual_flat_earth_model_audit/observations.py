@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Score the app's bundled observations (Antarctic Sun samples, QF27/28 tracks) against the FE vault model."""
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Iterator, TextIO
+
+import numpy as np
+
+import mismatch_engine as engine
+from figure import Figure
+from star_catalogue import source_files
+from svg_writer import SvgWriter
+
+ROOT = Path(__file__).resolve().parent
+VIS = ROOT / "visuals"
+DUMP_SCRIPT = ROOT / "observations_dump.mjs"
+CACHE_DIR = ROOT / ".cache"
+RESULTS_DIR = ROOT / "scores"
+# flightRoutes.js: mean great-circle miles per degree, used to turn air speed into deg/h.
+MI_PER_DEG = 69.0936
+COLUMNS = {
+    "sun_station": "u1", "sun_ms": "<i8", "sun_az": "<f4", "sun_el": "<f4",
+    "sun_ra_deg": "<f8", "sun_dec_deg": "<f8", "sun_gmst_deg": "<f8",
+    "flight_offsets": "<i8", "flight_lat": "<f8", "flight_lon": "<f8", "flight_asp": "<f4",
+}
+STATION_COLORS = ["#60a5fa", "#f97316", "#a3e635", "#eab308", "#f472b6", "#22d3ee"]
+CSS = (
+    ".title{font:700 24px system-ui,-apple-system,Segoe UI,sans-serif;fill:#f8fafc}"
+    ".subtitle{font:500 13px system-ui,-apple-system,Segoe UI,sans-serif;fill:#cbd5e1}"
+    ".label{font:600 13px system-ui,-apple-system,Segoe UI,sans-serif;fill:#e5e7eb}"
+    ".small{font:500 11px system-ui,-apple-system,Segoe UI,sans-serif;fill:#cbd5e1}"
+    ".tiny{font:500 10px system-ui,-apple-system,Segoe UI,sans-serif;fill:#94a3b8}"
+    ".axis{stroke:#475569;fill:none}.ref{stroke:#64748b;stroke-dasharray:4 4}"
+    + "".join(f".s{i}{{fill:{c}}}" for i, c in enumerate(STATION_COLORS))
+)
+
+
+def source_hash() -> str:
+    h = hashlib.sha256()
+    for path in source_files([DUMP_SCRIPT]):
+        h.update(path.relative_to(ROOT).as_posix().encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def build_cache(dump: dict, path: Path, digest: str) -> None:
+    """Pack the dump into one .npy per column plus meta.json, then move the directory into place."""
+    sun = dump["sun"]
+    flights = dump["flights"]
+    arrays = {
+        "sun_station": sun["station"], "sun_ms": sun["ms"], "sun_az": sun["az"], "sun_el": sun["el"],
+        "sun_ra_deg": sun["raDeg"], "sun_dec_deg": sun["decDeg"], "sun_gmst_deg": sun["gmstDeg"],
+        "flight_offsets": np.cumsum([0] + [len(f["lat"]) for f in flights]),
+        "flight_lat": [x for f in flights for x in f["lat"]],
+        "flight_lon": [x for f in flights for x in f["lon"]],
+        "flight_asp": [np.nan if x is None else x for f in flights for x in f["asp"]],
+    }
+    meta = {
+        "hash": digest, "stations": dump["stations"],
+        "flights": [{k: f[k] for k in ("id", "flight", "date", "actualSec", "predictedSec")} for f in flights],
+    }
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, dtype in COLUMNS.items():
+        np.save(tmp / f"{name}.npy", np.asarray(arrays[name], dtype=dtype))
+    (tmp / "meta.json").write_text(json.dumps(meta, indent=2) + "\n")
+    os.replace(tmp, path)
+
+
+def load_observations(refresh: bool = False) -> tuple[dict, dict[str, np.ndarray]]:
+    """Memory-mapped observation columns, extracted through Node only when the sources changed."""
+    digest = source_hash()
+    path = CACHE_DIR / f"observations-{digest}"
+    if refresh or not path.exists():
+        CACHE_DIR.mkdir(exist_ok=True)
+        proc = subprocess.run(["node", str(DUMP_SCRIPT)], cwd=ROOT, capture_output=True, check=True)
+        shutil.rmtree(path, ignore_errors=True)
+        build_cache(json.loads(proc.stdout), path, digest)
+        for stale in CACHE_DIR.glob("observations-*"):
+            if stale != path:
+                shutil.rmtree(stale)
+    meta = json.loads((path / "meta.json").read_text())
+    return meta, {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in COLUMNS}
+
+
+def _unit(az_deg, el_deg) -> np.ndarray:
+    """Local-globe (zenith, east, north) unit vectors from azimuth/elevation."""
+    az, el = np.radians(az_deg), np.radians(el_deg)
+    return np.stack([np.sin(el), np.cos(el) * np.sin(az), np.cos(el) * np.cos(az)], axis=-1)
+
+
+def _sep_deg(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.degrees(np.arccos(np.clip(np.einsum("...i,...i->...", a, b), -1, 1)))
+
+
+def score_sun(meta: dict, cols: dict[str, np.ndarray]) -> Iterator[dict[str, np.ndarray]]:
+    """Residuals of every Sun sample, one batch per station.
+
+    ``fe*`` is the straight line from the station to the Sun's FE vault
+    marker; ``optical*`` is the app's conventional local-sky direction from
+    the same RA/Dec, so ``opticalSepDeg`` measures ephemeris error alone.
+    """
+    for k, station in enumerate(meta["stations"]):
+        rows = np.flatnonzero(cols["sun_station"] == k)
+        ra = np.asarray(cols["sun_ra_deg"][rows])
+        dec = np.asarray(cols["sun_dec_deg"][rows])
+        gmst = np.asarray(cols["sun_gmst_deg"][rows])
+        vault_z = engine.vault_z_for_ids(["sun"], ra[:, None], dec[:, None])[:, 0]
+        r = {key: v[:, 0] for key, v in engine.evaluate(ra, dec, vault_z, [station["lat"]], [station["lon"]], gmst[:, None]).items()}
+        obs_az = np.asarray(cols["sun_az"][rows], dtype=np.float64)
+        obs_el = np.asarray(cols["sun_el"][rows], dtype=np.float64)
+        observed = _unit(obs_az, obs_el)
+        yield {
+            "row": rows, "station": np.full(len(rows), k), "ms": np.asarray(cols["sun_ms"][rows]),
+            "obsAzDeg": obs_az, "obsElDeg": obs_el,
+            "feAzDeg": r["lineToVaultAzDeg"], "feElDeg": r["lineToVaultElDeg"],
+            "feAzResidualDeg": (r["lineToVaultAzDeg"] - obs_az + 180) % 360 - 180,
+            "feElResidualDeg": r["lineToVaultElDeg"] - obs_el,
+            "feSepDeg": _sep_deg(_unit(r["lineToVaultAzDeg"], r["lineToVaultElDeg"]), observed),
+            "opticalSepDeg": _sep_deg(_unit(r["opticalAzDeg"], r["opticalElDeg"]), observed),
+        }
+
+
+def score_flights(meta: dict, cols: dict[str, np.ndarray]) -> Iterator[dict[str, np.ndarray]]:
+    """Per-segment path length of every track on the globe and on the AE disc, in degrees.
+
+    A disc unit spans 180 degrees of latitude, so ``discDeg`` is the chord
+    length between consecutive waypoints on the FE map times 180; on a
+    correct map it would equal the great-circle ``globeDeg``.
+    """
+    offsets = cols["flight_offsets"]
+    for k in range(len(meta["flights"])):
+        lo, hi = int(offsets[k]), int(offsets[k + 1])
+        lat = np.radians(np.asarray(cols["flight_lat"][lo:hi]))
+        lon = np.radians(np.asarray(cols["flight_lon"][lo:hi]))
+        a = np.sin(np.diff(lat) / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+        globe = np.degrees(2 * np.arcsin(np.sqrt(np.clip(a, 0, 1))))
+        disc_xy = engine.observer_fe_coord(np.degrees(lat), np.degrees(lon))[:, :2]
+        disc = 180 * np.linalg.norm(np.diff(disc_xy, axis=0), axis=-1)
+        yield {
+            "flight": np.full(hi - lo - 1, k), "segment": np.arange(hi - lo - 1),
+            "globeDeg": globe, "discDeg": disc,
+            "discToGlobe": np.divide(disc, globe, out=np.full_like(disc, np.nan), where=globe > 1e-9),
+            "airDegPerH": np.asarray(cols["flight_asp"][lo:hi - 1], dtype=np.float64) / MI_PER_DEG,
+        }
+
+
+def _stream(path: Path, batches: Iterator[dict[str, np.ndarray]], fmt: dict[str, str]) -> list[dict[str, np.ndarray]]:
+    """Write each batch's rows to ``path`` as CSV as soon as it is scored; return the batches."""
+    kept = []
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", newline="") as fh:
+        out = csv.writer(fh)
+        out.writerow(fmt)
+        for batch in batches:
+            out.writerows(zip(*(np.char.mod(f, batch[key]) for key, f in fmt.items())))
+            kept.append(batch)
+    os.replace(tmp, path)
+    return kept
+
+
+def summarize(meta: dict, sun: list[dict], flights: list[dict]) -> dict:
+    stations = []
+    for batch, station in zip(sun, meta["stations"]):
+        stations.append({
+            "id": station["id"], "name": station["name"], "samples": len(batch["row"]),
+            "medianFeSepDeg": float(np.median(batch["feSepDeg"])), "maxFeSepDeg": float(np.max(batch["feSepDeg"])),
+            "meanFeElResidualDeg": float(np.mean(batch["feElResidualDeg"])),
+            "medianOpticalSepDeg": float(np.median(batch["opticalSepDeg"])),
+        })
+    tracks = []
+    for batch, flight in zip(flights, meta["flights"]):
+        hours = flight["actualSec"] / 3600
+        globe, disc = float(batch["globeDeg"].sum()), float(batch["discDeg"].sum())
+        tracks.append({
+            "id": flight["id"], "segments": len(batch["segment"]), "actualHours": hours,
+            "globeDeg": globe, "discDeg": disc, "discToGlobe": disc / globe,
+            "globeDegPerH": globe / hours, "discDegPerH": disc / hours,
+            "meanAirDegPerH": float(np.nanmean(batch["airDegPerH"])),
+        })
+    return {"hash": meta["hash"], "stations": stations, "flights": tracks}
+
+
+def write_figure(out: TextIO, meta: dict, sun: list[dict], summary: dict) -> None:
+    """Observed vs FE-line Sun elevation, per-station angular gaps, and flight path lengths."""
+    w = SvgWriter(out, 1000, 860, background="#0b1020", css=CSS)
+    w.text(40, 42, "Bundled observations scored against the FE vault model", cls="title")
+    w.text(40, 65, f'{sum(len(b["row"]) for b in sun)} Antarctic Sun samples • {len(summary["flights"])} QF27/QF28 tracks • source hash {meta["hash"]}', cls="subtitle")
+
+    # A. Scatter: observed elevation vs straight line to the FE vault Sun.
+    px, py, pw, ph = 70, 110, 400, 340
+    x_lo, x_hi = -10.0, 50.0
+    y_lo, y_hi = 0.0, 90.0
+    sx = lambda v: px + (v - x_lo) / (x_hi - x_lo) * pw
+    sy = lambda v: py + ph - (v - y_lo) / (y_hi - y_lo) * ph
+    w.text(px, py - 14, "A. Sun elevation: observed vs line to FE vault", cls="label")
+    w.rect(px, py, pw, ph, cls="axis")
+    w.line(sx(x_lo), sy(max(x_lo, y_lo)), sx(x_hi), sy(x_hi), cls="ref")
+    for v in range(0, 91, 30):
+        w.text(px - 8, sy(v) + 4, f"{v}°", cls="tiny", text_anchor="end")
+    for v in range(-10, 51, 20):
+        w.text(sx(v), py + ph + 16, f"{v}°", cls="tiny", text_anchor="middle")
+    w.text(px + pw / 2, py + ph + 34, "observed elevation", cls="small", text_anchor="middle")
+    w.text(px - 44, py + ph / 2, "FE line elevation", cls="small", text_anchor="middle", transform=f"rotate(-90 {px - 44} {py + ph / 2})")
+    with w.group(opacity="0.8"):
+        for batch in sun:
+            cls = f's{int(batch["station"][0]) % len(STATION_COLORS)}'
+            for x, y in zip(batch["obsElDeg"], batch["feElDeg"]):
+                w.circle(sx(min(max(x, x_lo), x_hi)), sy(min(max(y, y_lo), y_hi)), 2.2, cls=cls)
+    w.text(sx(x_hi) - 4, sy(x_hi) + 14, "agreement", cls="tiny", text_anchor="end")
+
+    # B. Median angular gap per station, FE line vs conventional optical direction.
+    bx, by, bw = 560, 110, 380
+    w.text(bx, by - 14, "B. Median angular gap to observed Sun", cls="label")
+    vmax = max(s["maxFeSepDeg"] for s in summary["stations"]) or 1.0
+    for i, s in enumerate(summary["stations"]):
+        y = by + 14 + i * 52
+        w.text(bx, y, s["name"], cls=f"small s{i % len(STATION_COLORS)}")
+        w.text(bx + bw, y, f'FE {s["medianFeSepDeg"]:.1f}° • optical {s["medianOpticalSepDeg"]:.2f}°', cls="tiny", text_anchor="end")
+        w.rect(bx, y + 8, bw, 8, rx="3", fill="#1f2937")
+        w.rect(bx, y + 8, s["medianFeSepDeg"] / vmax * bw, 8, rx="3", fill="#f97316")
+        w.rect(bx, y + 20, max(1.0, s["medianOpticalSepDeg"] / vmax * bw), 4, rx="2", fill="#60a5fa")
+    ly = by + 14 + len(summary["stations"]) * 52
+    w.rect(bx, ly, 14, 8, fill="#f97316")
+    w.text(bx + 20, ly + 8, "line to FE vault Sun", cls="tiny")
+    w.rect(bx + 150, ly + 2, 14, 4, fill="#60a5fa")
+    w.text(bx + 170, ly + 8, "app optical (ephemeris only)", cls="tiny")
+
+    # C. Flight path length on the globe vs the AE disc.
+    cx, cy, cw = 70, 540, 820
+    w.text(cx, cy - 14, "C. Flight paths: great-circle length vs length along the FE map (central-angle degrees)", cls="label")
+    dmax = max(f["discDeg"] for f in summary["flights"]) or 1.0
+    for i, f in enumerate(summary["flights"]):
+        y = cy + 10 + i * 66
+        w.text(cx, y, f["id"].replace("_", " "), cls="small")
+        w.text(cx + 870, y, f'disc/globe {f["discToGlobe"]:.2f} • implied {f["globeDegPerH"]:.1f}°/h globe, {f["discDegPerH"]:.1f}°/h disc • mean air speed {f["meanAirDegPerH"]:.1f}°/h', cls="tiny", text_anchor="end")
+        w.rect(cx, y + 8, f["globeDeg"] / dmax * cw, 9, rx="3", fill="#60a5fa")
+        w.rect(cx, y + 21, f["discDeg"] / dmax * cw, 9, rx="3", fill="#f97316")
+        w.text(cx + f["globeDeg"] / dmax * cw + 6, y + 16, f'{f["globeDeg"]:.1f}°', cls="tiny")
+        w.text(cx + f["discDeg"] / dmax * cw + 6, y + 29, f'{f["discDeg"]:.1f}°', cls="tiny")
+    w.close()
+
+
+def write_residuals(out: TextIO, data: dict) -> None:
+    """Score the cached columns and draw the figure; the snapshot is not used."""
+    meta, cols = load_observations()
+    sun, flights = list(score_sun(meta, cols)), list(score_flights(meta, cols))
+    write_figure(out, meta, sun, summarize(meta, sun, flights))
+
+
+# Read from the observation cache, so staleness follows the extracted app sources instead of the snapshot.
+FIGURES = {"observation-residuals.svg": Figure(write_residuals, (), (), source_hash)}
+
+
+def render(name: str, data: dict, out: TextIO) -> None:
+    FIGURES[name].write(out, data)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--refresh", action="store_true", help="re-extract the datasets through Node")
+    p.add_argument("--out", type=Path, default=RESULTS_DIR, help="directory for residual CSVs and summary.json")
+    args = p.parse_args()
+    meta, cols = load_observations(args.refresh)
+    t0 = time.perf_counter()
+    args.out.mkdir(parents=True, exist_ok=True)
+    sun = _stream(args.out / "sun-residuals.csv", score_sun(meta, cols), {
+        "row": "%d", "station": "%d", "ms": "%d", "obsAzDeg": "%.3f", "obsElDeg": "%.3f",
+        "feAzDeg": "%.4f", "feElDeg": "%.4f", "feAzResidualDeg": "%.4f", "feElResidualDeg": "%.4f",
+        "feSepDeg": "%.4f", "opticalSepDeg": "%.4f",
+    })
+    flights = _stream(args.out / "flight-segments.csv", score_flights(meta, cols), {
+        "flight": "%d", "segment": "%d", "globeDeg": "%.5f", "discDeg": "%.5f", "discToGlobe": "%.4f", "airDegPerH": "%.3f",
+    })
+    summary = summarize(meta, sun, flights)
+    (args.out / "summary.json").write_text(json.dumps(summary, indent=2) + "\n")
+    VIS.mkdir(exist_ok=True)
+    figure = VIS / "observation-residuals.svg"
+    with open(figure, "w", encoding="utf-8") as fh:
+        write_figure(fh, meta, sun, summary)
+    print(f"scored {sum(len(b['row']) for b in sun)} Sun samples and {sum(len(b['segment']) for b in flights)} flight segments in {time.perf_counter() - t0:.2f} s")
+    print(f"{args.out.relative_to(ROOT) if args.out.is_relative_to(ROOT) else args.out}, {figure.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
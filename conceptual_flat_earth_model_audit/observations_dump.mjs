@@ -0,0 +1,38 @@
+// Dump the app's bundled observation datasets as columnar JSON for observations.py.
+//
+// Only run on a cache miss: the Python loader keeps .npy columns keyed on a
+// hash of these modules and their imports. Sun samples are joined with the
+// model's own Sun RA/Dec (the app's Ptolemy pipeline, as in ephemeris_batch.mjs)
+// and GMST at the sample time, so the FE vault position can be rebuilt in
+// Python without Node.
+import { ANTARCTIC_SUN_SAMPLES } from './source/js/data/antarcticSunSamples.js';
+import { FLIGHT_TRACKS } from './source/js/data/flightTracks.js';
+import { bodyRADec, greenwichSiderealDeg } from './source/js/core/ephemeris.js';
+
+const TO_DEG = 180 / Math.PI;
+const { stations, samples } = ANTARCTIC_SUN_SAMPLES;
+const stationIndex = new Map(stations.map((s, i) => [s.id, i]));
+
+const sun = { station: [], ms: [], az: [], el: [], raDeg: [], decDeg: [], gmstDeg: [] };
+for (const s of samples) {
+  const date = new Date(s.utcISO);
+  const eq = bodyRADec('sun', date);
+  sun.station.push(stationIndex.get(s.stationId));
+  sun.ms.push(date.getTime());
+  sun.az.push(s.az);
+  sun.el.push(s.el);
+  sun.raDeg.push(eq.ra * TO_DEG);
+  sun.decDeg.push(eq.dec * TO_DEG);
+  sun.gmstDeg.push(greenwichSiderealDeg(date));
+}
+
+process.stdout.write(JSON.stringify({
+  stations: stations.map(({ id, name, lat, lon }) => ({ id, name, lat, lon })),
+  sun,
+  flights: FLIGHT_TRACKS.map((t) => ({
+    id: t.id, flight: t.flight, date: t.date, actualSec: t.actualSec, predictedSec: t.predictedSec,
+    lat: t.waypoints.map((w) => w.lat),
+    lon: t.waypoints.map((w) => w.lon),
+    asp: t.waypoints.map((w) => (Number.isFinite(w.asp) ? w.asp : null)),
+  })),
+}));
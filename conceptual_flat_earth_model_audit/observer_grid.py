@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Score every object in the sample snapshot over a lat/lon grid of observers and draw a heatmap."""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import TextIO
+
+import numpy as np
+
+import mismatch_engine as engine
+from figure import Figure
+from svg_writer import SvgWriter
+
+ROOT = Path(__file__).resolve().parent
+VIS = ROOT / "visuals"
+FIELDS = ("separationDeg", "missDistance")
+DEFAULT_STEP = 2.0
+# Dark-to-hot ramp drawn from the palette the other visuals use.
+RAMP = ["#0b2545", "#1d4ed8", "#60a5fa", "#a3e635", "#eab308", "#f97316", "#ef4444", "#fecaca"]
+NAN_FILL = "#1f2937"
+CSS = (
+    ".title{font:700 24px system-ui,-apple-system,Segoe UI,sans-serif;fill:#f8fafc}"
+    ".subtitle{font:500 13px system-ui,-apple-system,Segoe UI,sans-serif;fill:#cbd5e1}"
+    ".label{font:600 13px system-ui,-apple-system,Segoe UI,sans-serif;fill:#e5e7eb}"
+    ".tiny{font:500 10px system-ui,-apple-system,Segoe UI,sans-serif;fill:#94a3b8}"
+    + "".join(f".b{i}{{fill:{color}}}" for i, color in enumerate(RAMP))
+)
+
+
+def grid_axes(step_deg: float) -> tuple[np.ndarray, np.ndarray]:
+    """Cell-centre latitudes (north to south) and longitudes (west to east)."""
+    lats = 90 - step_deg / 2 - step_deg * np.arange(round(180 / step_deg))
+    lons = -180 + step_deg / 2 + step_deg * np.arange(round(360 / step_deg))
+    return lats, lons
+
+
+def _score_tile(shm_name: str, shape: tuple[int, ...], inputs: dict, lats: np.ndarray, lons: np.ndarray, row0: int) -> int:
+    """Worker: evaluate one band of latitude rows and write it into the shared result."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        lat, lon = np.meshgrid(lats, lons, indexing="ij")
+        result = engine.evaluate(inputs["ra_deg"], inputs["dec_deg"], inputs["vault_z"], lat.ravel(), lon.ravel(), inputs["gmst"])
+        rows = slice(row0, row0 + len(lats))
+        for f, field in enumerate(FIELDS):
+            out[f, :, rows, :] = result[field].reshape(-1, len(lats), len(lons))
+    finally:
+        shm.close()
+    return len(lats)
+
+
+def score_grid(inputs: dict, step_deg: float = 1.0, workers: int | None = None, tile_rows: int | None = None) -> dict:
+    """Evaluate every object at every grid cell, spread over a process pool.
+
+    Latitude bands are handed to workers, which write straight into one
+    shared-memory array of shape (len(FIELDS), N, n_lat, n_lon). With one
+    worker the grid is evaluated inline.
+    """
+    lats, lons = grid_axes(step_deg)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        lat, lon = np.meshgrid(lats, lons, indexing="ij")
+        result = engine.evaluate(inputs["ra_deg"], inputs["dec_deg"], inputs["vault_z"], lat.ravel(), lon.ravel(), inputs["gmst"])
+        return {"lats": lats, "lons": lons,
+                **{field: result[field].reshape(-1, len(lats), len(lons)) for field in FIELDS}}
+    tile_rows = tile_rows or max(1, math.ceil(len(lats) / (4 * workers)))
+    shape = (len(FIELDS), len(inputs["ra_deg"]), len(lats), len(lons))
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = [
+                pool.submit(_score_tile, shm.name, shape, inputs, lats[r:r + tile_rows], lons, r)
+                for r in range(0, len(lats), tile_rows)
+            ]
+            for job in jobs:
+                job.result()
+        out = np.ndarray(shape, dtype=np.float64, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+    return {"lats": lats, "lons": lons, **{field: out[f] for f, field in enumerate(FIELDS)}}
+
+
+def write_heatmap(out: TextIO, data: dict, grid: dict, field: str = "separationDeg") -> None:
+    """Small-multiple equirectangular heatmaps, one panel per object."""
+    labels = [b["label"] for b in data["bodies"]]
+    values = grid[field]
+    lats, lons = grid["lats"], grid["lons"]
+    vmax = 180.0 if field == "separationDeg" else float(np.nanpercentile(values, 95)) or 1.0
+    unit = "°" if field == "separationDeg" else "R"
+    nan = np.isnan(values)
+    bins = np.clip((np.where(nan, 0, values) / vmax * len(RAMP)).astype(np.int64), 0, len(RAMP) - 1)
+    bins[nan] = -1
+    cols, pw, ph, gap = 2, 440, 220, 46
+    top = 100
+    rows = math.ceil(len(labels) / cols)
+    width, height = 1000, top + rows * (ph + gap) + 70
+    cw, ch = pw / len(lons), ph / len(lats)
+    obs = data["observer"]
+    w = SvgWriter(out, width, height, background="#0b1020", css=CSS)
+    w.text(40, 42, f'{"Angular gap" if field == "separationDeg" else "Miss distance"} by observer position', cls="title")
+    w.text(40, 65, f'{data["dateIso"]} • {len(lats)}×{len(lons)} observers ({lats[0] - lats[1]:g}° grid) • equirectangular, north up • green: sample observer', cls="subtitle")
+    for k, label in enumerate(labels):
+        px = 40 + (k % cols) * (pw + 40)
+        py = top + (k // cols) * (ph + gap)
+        w.text(px, py - 8, label, cls="label")
+        w.text(px + pw, py - 8, f"median {np.nanmedian(values[k]):.1f}{unit}", cls="tiny", text_anchor="end")
+        with w.group(shape_rendering="crispEdges"):
+            w.rect(px, py, pw, ph, fill=NAN_FILL)
+            # Merge horizontal runs of the same colour bin into one rect.
+            for i, row in enumerate(bins[k]):
+                edges = np.flatnonzero(np.diff(row)) + 1
+                starts = np.concatenate(([0], edges))
+                ends = np.concatenate((edges, [len(row)]))
+                for s, e in zip(starts, ends):
+                    if row[s] >= 0:
+                        w.rect(px + s * cw, py + i * ch, (e - s) * cw, ch, cls=f"b{row[s]}")
+        w.rect(px, py, pw, ph, fill="none", stroke="#334155")
+        w.circle(px + (obs["lonDeg"] + 180) / 360 * pw, py + (90 - obs["latDeg"]) / 180 * ph, 3.5, fill="#22c55e", stroke="#bbf7d0")
+    ly = height - 42
+    sw = 300 / len(RAMP)
+    for i in range(len(RAMP)):
+        w.rect(40 + i * sw, ly, sw, 10, cls=f"b{i}")
+    w.text(40, ly + 24, f"0{unit}", cls="tiny")
+    w.text(340, ly + 24, f"≥{vmax:.3g}{unit}", cls="tiny", text_anchor="end")
+    if field == "missDistance":
+        w.rect(370, ly, 18, 10, fill=NAN_FILL)
+        w.text(396, ly + 9, "below horizon (no miss distance)", cls="tiny")
+    w.close()
+
+
+def write_default(out: TextIO, data: dict, field: str) -> None:
+    """Heatmap of ``field`` at the default step, scored on a single core."""
+    grid = score_grid(engine.sample_inputs(data), DEFAULT_STEP, workers=1)
+    write_heatmap(out, data, grid, field)
+
+
+# Output name -> figure spec for the build runner.
+FIGURES = {
+    "observer-grid-separation.svg": Figure(partial(write_default, field="separationDeg"),
+                                           ("observer", "dateIso", "gmstDeg"), ("label", "raDeg", "decDeg", "vaultZ")),
+}
+
+
+def render(name: str, data: dict, out: TextIO) -> None:
+    FIGURES[name].write(out, data)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--step", type=float, default=DEFAULT_STEP, help="grid spacing in degrees (2 keeps the committed SVG small)")
+    p.add_argument("--workers", type=int, default=None, help="process count (default: all cores)")
+    p.add_argument("--field", choices=FIELDS, default="separationDeg")
+    p.add_argument("--data", type=Path, default=ROOT / "pipeline-sample-data.json")
+    p.add_argument("--npz", type=Path, help="also save the raw grid arrays here")
+    args = p.parse_args()
+    data = json.loads(args.data.read_text())
+    grid = score_grid(engine.sample_inputs(data), args.step, args.workers)
+    if args.npz:
+        np.savez_compressed(args.npz, **grid)
+    VIS.mkdir(exist_ok=True)
+    name = "observer-grid-separation.svg" if args.field == "separationDeg" else "observer-grid-miss-distance.svg"
+    out = VIS / name
+    with open(out, "w", encoding="utf-8") as fh:
+        write_heatmap(fh, data, grid, args.field)
+    print(out.relative_to(ROOT))
+
+
+if __name__ == "__main__":
+    main()
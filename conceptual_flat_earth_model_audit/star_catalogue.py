@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Struct-of-arrays star catalogue table, cached as a memory-mapped binary file."""
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent
+CORE = ROOT / "source" / "js" / "core"
+DUMP_SCRIPT = ROOT / "star_catalogue_dump.mjs"
+CACHE_DIR = ROOT / ".cache"
+SOURCES = ["celnavStars.js", "celTheoStars.js", "_namedStarsHyg.js", "_namedStarsHygExtra.js", "brightStarCatalog.js"]
+CATALOGUES = ["celnav", "celtheo", "hyg_named", "hyg_extra", "bsc"]
+MAGIC = b"FESTAR01"
+ALIGN = 64
+IMPORT_RE = re.compile(r"""from\s+['"](\.{1,2}/[^'"]+\.m?js)['"]""")
+
+
+def source_files(roots: list[Path] | None = None) -> list[Path]:
+    """``roots`` (default: the catalogue modules) plus everything they import, in a stable order."""
+    seen: dict[Path, None] = {}
+    stack = list(roots) if roots is not None else [CORE / name for name in SOURCES]
+    while stack:
+        path = stack.pop(0).resolve()
+        if path in seen:
+            continue
+        seen[path] = None
+        stack.extend(path.parent / rel for rel in IMPORT_RE.findall(path.read_text()))
+    return sorted(seen)
+
+
+def source_hash() -> str:
+    h = hashlib.sha256()
+    for path in [*source_files(), DUMP_SCRIPT]:
+        h.update(path.relative_to(ROOT).as_posix().encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+class StarTable:
+    """Column arrays over one mmap; strings are interned and decoded on demand.
+
+    ``ra_deg``/``dec_deg`` are float64 J2000 degrees, ``mag`` float32 (NaN if
+    unknown), ``catalogue`` a uint8 index into CATALOGUES, and ``id``/``name``/
+    ``cat`` int32 indices into the shared string pool.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != MAGIC:
+            raise ValueError(f"{path} is not a star table")
+        (header_len,) = struct.unpack_from("<Q", self._mm, 8)
+        self.header = json.loads(self._mm[16:16 + header_len])
+        cols = {name: np.frombuffer(self._mm, dtype=dtype, count=count, offset=offset)
+                for name, (dtype, offset, count) in self.header["columns"].items()}
+        self.ra_deg = cols["ra_deg"]
+        self.dec_deg = cols["dec_deg"]
+        self.mag = cols["mag"]
+        self.catalogue = cols["catalogue"]
+        self.id = cols["id"]
+        self.name = cols["name"]
+        self.cat = cols["cat"]
+        self._str_offsets = cols["str_offsets"]
+        self._str_blob = cols["str_blob"]
+        self._id_lookup: dict[str, dict[str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ra_deg)
+
+    def string(self, i: int) -> str:
+        return self._str_blob[self._str_offsets[i]:self._str_offsets[i + 1]].tobytes().decode()
+
+    def ids(self, rows=None) -> list[str]:
+        return [self.string(i) for i in (self.id if rows is None else self.id[rows])]
+
+    def names(self, rows=None) -> list[str]:
+        return [self.string(i) for i in (self.name if rows is None else self.name[rows])]
+
+    def select(self, catalogue: str) -> np.ndarray:
+        """Row indices belonging to one of CATALOGUES."""
+        return np.flatnonzero(self.catalogue == CATALOGUES.index(catalogue))
+
+    def find(self, star_id: str, catalogue: str = "bsc") -> int | None:
+        """Row index of ``star_id`` within ``catalogue``, or None."""
+        lookup = self._id_lookup.get(catalogue)
+        if lookup is None:
+            rows = self.select(catalogue)
+            lookup = self._id_lookup[catalogue] = dict(zip(self.ids(rows), rows.tolist()))
+        return lookup.get(star_id)
+
+
+def _aligned(n: int) -> int:
+    return -(-n // ALIGN) * ALIGN
+
+
+def build_table(dump: dict, path: Path, digest: str) -> None:
+    """Intern strings, pack the columns and write the table atomically."""
+    pool: dict[str, int] = {}
+
+    def intern(s: str) -> int:
+        return pool.setdefault(s, len(pool))
+
+    ra, dec, mag, catalogue, ids, names, cats = [], [], [], [], [], [], []
+    for code, key in enumerate(CATALOGUES):
+        for row in dump[key]:
+            ra.append(row["raH"] * 15.0)
+            dec.append(row["decD"])
+            mag.append(np.nan if row["mag"] is None else row["mag"])
+            catalogue.append(code)
+            ids.append(intern(row["id"]))
+            names.append(intern(row["name"]))
+            cats.append(intern(row["cat"]))
+    encoded = [s.encode() for s in pool]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    arrays = {
+        "ra_deg": np.array(ra, dtype="<f8"),
+        "dec_deg": np.array(dec, dtype="<f8"),
+        "mag": np.array(mag, dtype="<f4"),
+        "catalogue": np.array(catalogue, dtype="u1"),
+        "id": np.array(ids, dtype="<i4"),
+        "name": np.array(names, dtype="<i4"),
+        "cat": np.array(cats, dtype="<i4"),
+        "str_offsets": offsets,
+        "str_blob": np.frombuffer(b"".join(encoded), dtype="u1"),
+    }
+    # Header size depends on the offsets it lists; reserve a generous fixed block.
+    header_room = 4096
+    offset = _aligned(16 + header_room)
+    columns = {}
+    for name, arr in arrays.items():
+        columns[name] = [arr.dtype.str, offset, len(arr)]
+        offset = _aligned(offset + arr.nbytes)
+    header = json.dumps({"hash": digest, "rows": len(ra), "catalogues": CATALOGUES, "columns": columns}).encode()
+    if len(header) > header_room:
+        raise ValueError("star table header too large")
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, arr in arrays.items():
+            fh.seek(columns[name][1])
+            fh.write(arr.tobytes())
+        fh.truncate(offset)
+    os.replace(tmp, path)
+
+
+def load_stars(refresh: bool = False) -> StarTable:
+    """Open the cached table, extracting it through Node only when the sources changed."""
+    digest = source_hash()
+    path = CACHE_DIR / f"stars-{digest}.bin"
+    if refresh or not path.exists():
+        CACHE_DIR.mkdir(exist_ok=True)
+        proc = subprocess.run(["node", str(DUMP_SCRIPT)], cwd=ROOT, capture_output=True, check=True)
+        build_table(json.loads(proc.stdout), path, digest)
+        for stale in CACHE_DIR.glob("stars-*.bin"):
+            if stale != path:
+                stale.unlink()
+    return StarTable(path)
+
+
+if __name__ == "__main__":
+    table = load_stars()
+    counts = ", ".join(f"{key} {len(table.select(key))}" for key in CATALOGUES)
+    print(f"{table.path.relative_to(ROOT)}: {len(table)} rows ({counts})")
@@ -0,0 +1,28 @@
+// Dump the app's star catalogues as JSON for star_catalogue.py.
+//
+// Only run on a cache miss: the Python loader keeps a binary table keyed on
+// a hash of these modules and their imports. Entries without a finite J2000
+// position (satellites, dynamic solar-system bodies, Cel Theo `extId`
+// references) are dropped.
+import { CEL_NAV_STARS } from './source/js/core/celnavStars.js';
+import { CEL_THEO_STARS } from './source/js/core/celTheoStars.js';
+import { NAMED_STARS_HYG } from './source/js/core/_namedStarsHyg.js';
+import { NAMED_STARS_HYG_EXTRA } from './source/js/core/_namedStarsHygExtra.js';
+import { BRIGHT_STAR_CATALOG } from './source/js/core/brightStarCatalog.js';
+
+function rows(list, fallbackCat) {
+  return list
+    .filter((s) => Number.isFinite(s.raH) && Number.isFinite(s.decD))
+    .map((s) => ({
+      id: s.id, name: s.name ?? s.id, raH: s.raH, decD: s.decD,
+      mag: Number.isFinite(s.mag) ? s.mag : null, cat: s.cat ?? fallbackCat,
+    }));
+}
+
+process.stdout.write(JSON.stringify({
+  celnav: rows(CEL_NAV_STARS, 'celnav'),
+  celtheo: rows(CEL_THEO_STARS, 'celtheo'),
+  hyg_named: rows(NAMED_STARS_HYG, 'named'),
+  hyg_extra: rows(NAMED_STARS_HYG_EXTRA, 'named'),
+  bsc: rows(BRIGHT_STAR_CATALOG, 'named'),
+}));
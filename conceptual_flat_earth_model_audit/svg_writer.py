@@ -0,0 +1,150 @@
+"""Streaming SVG writer shared by the audit generators.
+
+Elements go straight to the output stream instead of being collected in
+lists. Repeated markers are defined once as ``<symbol>`` and stamped with
+``<use>``, presentation lives in CSS classes, coordinates are quantized to a
+fixed number of decimals, and polylines are decimated in screen space so a
+dense ring or track only keeps the points that move the drawn line by more
+than ``tolerance`` pixels.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Sequence, TextIO
+from xml.sax.saxutils import escape, quoteattr
+
+Point = tuple[float, float]
+
+
+def decimate(points: Sequence[Point], tolerance: float) -> list[Point]:
+    """Ramer-Douglas-Peucker simplification with a pixel tolerance (iterative)."""
+    n = len(points)
+    if n < 3 or tolerance <= 0:
+        return list(points)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    tol_sq = tolerance * tolerance
+    while stack:
+        lo, hi = stack.pop()
+        ax, ay = points[lo]
+        bx, by = points[hi]
+        dx, dy = bx - ax, by - ay
+        seg_sq = dx * dx + dy * dy
+        best, best_d = -1, tol_sq
+        for i in range(lo + 1, hi):
+            px, py = points[i]
+            if seg_sq == 0:
+                d = (px - ax) ** 2 + (py - ay) ** 2
+            else:
+                cross = dx * (py - ay) - dy * (px - ax)
+                d = cross * cross / seg_sq
+            if d > best_d:
+                best, best_d = i, d
+        if best >= 0:
+            keep[best] = True
+            stack.append((lo, best))
+            stack.append((best, hi))
+    return [p for p, k in zip(points, keep) if k]
+
+
+class SvgWriter:
+    """Write one SVG document to ``out`` element by element."""
+
+    def __init__(self, out: TextIO, width: int, height: int, *, background: str | None = None,
+                 css: str = "", defs: str = "", precision: int = 1, tolerance: float = 0.25):
+        self.out = out
+        self.precision = precision
+        self.tolerance = tolerance
+        self._symbols: set[str] = set()
+        out.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+                  f'viewBox="0 0 {width} {height}" role="img">')
+        if background:
+            out.write(f'<rect width="100%" height="100%" fill="{background}"/>')
+        if css:
+            out.write(f"<style>{css}</style>")
+        if defs:
+            out.write(f"<defs>{defs}</defs>")
+
+    @classmethod
+    def fragment(cls, out: TextIO, *, precision: int = 1, tolerance: float = 0.25) -> SvgWriter:
+        """A writer that emits elements only, for markup cached and spliced into documents."""
+        w = cls.__new__(cls)
+        w.out = out
+        w.precision = precision
+        w.tolerance = tolerance
+        w._symbols = set()
+        return w
+
+    def num(self, x: float) -> str:
+        """Quantize to ``precision`` decimals and drop redundant zeros."""
+        s = f"{x:.{self.precision}f}"
+        if "." in s:
+            s = s.rstrip("0").rstrip(".")
+        return "0" if s in ("-0", "") else s
+
+    def _attrs(self, attrs: dict) -> str:
+        parts = []
+        for key, value in attrs.items():
+            if value is None:
+                continue
+            name = "class" if key == "cls" else key.rstrip("_").replace("_", "-")
+            if isinstance(value, float):
+                value = self.num(value)
+            parts.append(f" {name}={quoteattr(str(value))}")
+        return "".join(parts)
+
+    def raw(self, markup: str) -> None:
+        self.out.write(markup)
+
+    def symbol(self, sid: str, markup: str) -> None:
+        """Define a reusable marker once; draw it centred on (0, 0)."""
+        if sid in self._symbols:
+            return
+        self._symbols.add(sid)
+        self.out.write(f'<defs><symbol id="{sid}" overflow="visible">{markup}</symbol></defs>')
+
+    def use(self, sid: str, x: float, y: float, **attrs) -> None:
+        self.out.write(f'<use href="#{sid}" x="{self.num(x)}" y="{self.num(y)}"{self._attrs(attrs)}/>')
+
+    def path_data(self, points: Iterable[Point], tolerance: float | None = None, closed: bool = False) -> str:
+        pts = decimate(list(points), self.tolerance if tolerance is None else tolerance)
+        coords: list[str] = []
+        last = None
+        for x, y in pts:
+            q = f"{self.num(x)} {self.num(y)}"
+            if q != last:
+                coords.append(q)
+                last = q
+        if not coords:
+            return ""
+        return "M" + "L".join(coords) + ("Z" if closed else "")
+
+    def path(self, points: Iterable[Point], *, tolerance: float | None = None, closed: bool = False, **attrs) -> None:
+        d = self.path_data(points, tolerance, closed)
+        if d:
+            self.out.write(f'<path d="{d}"{self._attrs(attrs)}/>')
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, **attrs) -> None:
+        self.out.write(f'<line x1="{self.num(x1)}" y1="{self.num(y1)}" x2="{self.num(x2)}" '
+                       f'y2="{self.num(y2)}"{self._attrs(attrs)}/>')
+
+    def circle(self, cx: float, cy: float, r: float, **attrs) -> None:
+        self.out.write(f'<circle cx="{self.num(cx)}" cy="{self.num(cy)}" r="{self.num(r)}"{self._attrs(attrs)}/>')
+
+    def rect(self, x: float, y: float, width: float, height: float, **attrs) -> None:
+        self.out.write(f'<rect x="{self.num(x)}" y="{self.num(y)}" width="{self.num(width)}" '
+                       f'height="{self.num(height)}"{self._attrs(attrs)}/>')
+
+    def text(self, x: float, y: float, content: str, **attrs) -> None:
+        self.out.write(f'<text x="{self.num(x)}" y="{self.num(y)}"{self._attrs(attrs)}>{escape(content)}</text>')
+
+    @contextmanager
+    def group(self, **attrs) -> Iterator[None]:
+        self.out.write(f"<g{self._attrs(attrs)}>")
+        yield
+        self.out.write("</g>")
+
+    def close(self) -> None:
+        self.out.write("</svg>\n")
+
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Stream the optical-vs-vault mismatch fields over a date range into chunked .npy columns."""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+import mismatch_engine as engine
+
+ROOT = Path(__file__).resolve().parent
+EPHEMERIS_BATCH = ROOT / "ephemeris_batch.mjs"
+# Same object set and order as generate_sample_data.mjs.
+DEFAULT_IDS = [
+    "sun", "moon", "mars", "jupiter", "saturn",
+    "star:sirius", "star:polaris", "star:arcturus", "star:vega", "star:betelgeuse",
+]
+# Per-step columns are (count,), per-body columns (count, N), vectors (count, N, 3).
+STEP_FIELDS = {"gmstDeg": np.float64}
+BODY_FIELDS = {
+    "raDeg": np.float32, "decDeg": np.float32, "vaultZ": np.float32,
+    "opticalAzDeg": np.float32, "opticalElDeg": np.float32,
+    "lineToVaultAzDeg": np.float32, "lineToVaultElDeg": np.float32,
+    "separationDeg": np.float32, "missDistance": np.float32, "belowHorizon": np.bool_,
+}
+VECTOR_FIELDS = {"rayAtVaultZ": np.float32}
+INDEX_NAME = "index.json"
+
+
+def parse_utc_ms(text: str) -> int:
+    dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return round(dt.timestamp() * 1000)
+
+
+def ephemeris(start_ms: int, step_ms: int, count: int, ids: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """GMST (count,) plus RA/Dec (count, N) in degrees from the app's ephemeris modules."""
+    proc = subprocess.run(
+        ["node", str(EPHEMERIS_BATCH), "--start-ms", str(start_ms), "--step-ms", str(step_ms),
+         "--count", str(count), "--ids", ",".join(ids)],
+        cwd=ROOT, capture_output=True, check=True,
+    )
+    rows = np.frombuffer(proc.stdout, dtype="<f8").reshape(count, 1 + 2 * len(ids))
+    return rows[:, 0], rows[:, 1::2], rows[:, 2::2]
+
+
+def evaluate_chunk(start_ms: int, step_ms: int, count: int, ids: list[str], lat: float, lon: float) -> dict[str, np.ndarray]:
+    gmst, ra, dec = ephemeris(start_ms, step_ms, count, ids)
+    vault_z = engine.vault_z_for_ids(ids, ra, dec)
+    n = len(ids)
+    # Flatten (step, body) into the engine's body axis; one observer.
+    result = engine.evaluate(
+        ra.ravel(), dec.ravel(), vault_z.ravel(), [lat], [lon],
+        np.repeat(gmst, n)[:, None],
+    )
+    out = {"gmstDeg": gmst, "raDeg": ra, "decDeg": dec, "vaultZ": vault_z}
+    for key in BODY_FIELDS.keys() - out.keys():
+        out[key] = result[key][:, 0].reshape(count, n)
+    out["rayAtVaultZ"] = result["rayAtVaultZ"][:, 0].reshape(count, n, 3)
+    return out
+
+
+def field_shape(name: str, count: int, n: int) -> tuple[int, ...]:
+    if name in STEP_FIELDS:
+        return (count,)
+    if name in VECTOR_FIELDS:
+        return (count, n, 3)
+    return (count, n)
+
+
+def write_index(out_dir: Path, index: dict) -> None:
+    tmp = out_dir / (INDEX_NAME + ".tmp")
+    tmp.write_text(json.dumps(index, indent=2) + "\n")
+    os.replace(tmp, out_dir / INDEX_NAME)
+
+
+def run_sweep(out_dir: Path, start_ms: int, end_ms: int, step_ms: int, chunk: int,
+              ids: list[str], lat: float, lon: float) -> dict:
+    """Evaluate every step in [start_ms, end_ms) and stream it to out_dir.
+
+    Each field is a preallocated memory-mapped ``<field>.npy``; ``index.json``
+    records the sweep parameters and how many chunks are durable on disk, so
+    an interrupted run picks up at the first unfinished chunk.
+    """
+    if step_ms <= 0:
+        raise ValueError("step must be a positive number of milliseconds")
+    if chunk <= 0:
+        raise ValueError("chunk must be a positive number of steps")
+    count = (end_ms - start_ms) // step_ms
+    if count <= 0:
+        raise ValueError("end must be at least one step after start")
+    params = {
+        "startMs": start_ms, "stepMs": step_ms, "count": count, "chunk": chunk,
+        "ids": ids, "observer": {"latDeg": lat, "lonDeg": lon},
+    }
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fields = {**STEP_FIELDS, **BODY_FIELDS, **VECTOR_FIELDS}
+    index_path = out_dir / INDEX_NAME
+    index = json.loads(index_path.read_text()) if index_path.exists() else None
+    if index is not None and index["params"] != params:
+        raise SystemExit(f"{out_dir} holds a sweep with different parameters; pick a new --out")
+    resume = index is not None
+    mode = "r+" if resume else "w+"
+    columns = {
+        name: np.lib.format.open_memmap(
+            out_dir / f"{name}.npy", mode=mode, dtype=dtype, shape=None if resume else field_shape(name, count, len(ids)),
+        )
+        for name, dtype in fields.items()
+    }
+    if not resume:
+        index = {"params": params, "fields": list(fields), "chunksDone": 0, "rowsDone": 0}
+        write_index(out_dir, index)
+
+    n_chunks = -(-count // chunk)
+    for c in range(index["chunksDone"], n_chunks):
+        lo = c * chunk
+        hi = min(count, lo + chunk)
+        values = evaluate_chunk(start_ms + lo * step_ms, step_ms, hi - lo, ids, lat, lon)
+        for name, col in columns.items():
+            col[lo:hi] = values[name]
+            col.flush()
+        index.update(chunksDone=c + 1, rowsDone=hi)
+        write_index(out_dir, index)
+        print(f"chunk {c + 1}/{n_chunks} rows {lo}-{hi - 1}", flush=True)
+    return index
+
+
+def open_sweep(out_dir: Path) -> tuple[dict, dict[str, np.ndarray]]:
+    """Read-only memory maps of a sweep, trimmed to the rows already written."""
+    index = json.loads((out_dir / INDEX_NAME).read_text())
+    rows = index["rowsDone"]
+    return index, {name: np.load(out_dir / f"{name}.npy", mmap_mode="r")[:rows] for name in index["fields"]}
+
+
+def main() -> None:
+    sample = json.loads((ROOT / "pipeline-sample-data.json").read_text())
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--start", default=sample["dateIso"], help="ISO-8601 UTC start (default: sample snapshot)")
+    p.add_argument("--end", help="ISO-8601 UTC end, exclusive (default: start + 1 day)")
+    p.add_argument("--step-min", type=float, default=1.0, help="step in minutes")
+    p.add_argument("--chunk", type=int, default=4096, help="steps per chunk written to disk")
+    p.add_argument("--ids", default=",".join(DEFAULT_IDS), help="comma-separated object ids")
+    p.add_argument("--lat", type=float, default=sample["observer"]["latDeg"])
+    p.add_argument("--lon", type=float, default=sample["observer"]["lonDeg"])
+    p.add_argument("--out", type=Path, default=ROOT / "sweeps" / "default")
+    args = p.parse_args()
+    start_ms = parse_utc_ms(args.start)
+    end_ms = parse_utc_ms(args.end) if args.end else start_ms + 86_400_000
+    index = run_sweep(args.out, start_ms, end_ms, round(args.step_min * 60_000), args.chunk,
+                      args.ids.split(","), args.lat, args.lon)
+    print(f"{args.out}: {index['rowsDone']} steps x {len(index['params']['ids'])} objects")
+
+
+if __name__ == "__main__":
+    main()
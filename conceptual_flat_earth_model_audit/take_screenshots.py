@@ -1,28 +1,122 @@
+#!/usr/bin/env python3
+"""Capture pipeline_visualizer.html at every step from a bundled local server, several pages at a time."""
+from __future__ import annotations
+
+import argparse
 import asyncio
+import base64
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
 from playwright.async_api import async_playwright
 
-async def main():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page(viewport={"width": 1280, "height": 800})
-        await page.goto("http://localhost:8000/conceptual_flat_earth_model_audit/pipeline_visualizer.html")
+ROOT = Path(__file__).resolve().parent
+PAGE = "pipeline_visualizer.html"
+STEP_COUNT = 8  # len(STEPS) in pipeline_visualizer.html
+DEFAULT_VIEWPORT = (1280, 800)
+# Decode PNGs in the browser and hash the RGBA pixels, so equal images compare
+# equal even when their encoded bytes differ.
+PIXEL_DIGEST_JS = """async (pngs) => Promise.all(pngs.map(async (b64) => {
+  const bytes = Uint8Array.from(atob(b64), (c) => c.charCodeAt(0));
+  const bitmap = await createImageBitmap(new Blob([bytes], { type: 'image/png' }),
+    { colorSpaceConversion: 'none', premultiplyAlpha: 'none' });
+  const ctx = new OffscreenCanvas(bitmap.width, bitmap.height).getContext('2d');
+  ctx.drawImage(bitmap, 0, 0);
+  const digest = await crypto.subtle.digest('SHA-256', ctx.getImageData(0, 0, bitmap.width, bitmap.height).data);
+  return `${bitmap.width}x${bitmap.height}:` + [...new Uint8Array(digest)].map((b) => b.toString(16).padStart(2, '0')).join('');
+}))"""
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(directory: Path) -> ThreadingHTTPServer:
+    """Serve ``directory`` on a free localhost port from a daemon thread."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def output_path(step: int, viewport: tuple[int, int]) -> Path:
+    suffix = "" if viewport == DEFAULT_VIEWPORT else f"_{viewport[0]}x{viewport[1]}"
+    return ROOT / f"screenshot_step_{step}{suffix}.png"
+
+
+def parse_viewport(text: str) -> tuple[int, int]:
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+async def capture(context, base_url: str, step: int, viewport: tuple[int, int], timeout_ms: float) -> str:
+    """Render one step, wait for its settled frame and save it unless the pixels are unchanged."""
+    path = output_path(step, viewport)
+    page = await context.new_page()
+    try:
+        await page.set_viewport_size({"width": viewport[0], "height": viewport[1]})
+        await page.goto(f"{base_url}/{PAGE}?capture&step={step}")
+        await page.wait_for_function(f"document.body.dataset.renderedStep === '{step}'", timeout=timeout_ms)
+        png = await page.screenshot()
+        if path.exists():
+            old = path.read_bytes()
+            if old == png:
+                return f"unchanged {path.name}"
+            new_digest, old_digest = await page.evaluate(
+                PIXEL_DIGEST_JS, [base64.b64encode(png).decode(), base64.b64encode(old).decode()])
+            if new_digest == old_digest:
+                return f"unchanged {path.name}"
+    finally:
+        await page.close()
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(png)
+    os.replace(tmp, path)
+    return f"saved {path.name}"
+
+
+async def run(steps: list[int], viewports: list[tuple[int, int]], contexts: int, timeout_ms: float) -> None:
+    server = start_server(ROOT)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    jobs: asyncio.Queue = asyncio.Queue()
+    for viewport in viewports:
+        for step in steps:
+            jobs.put_nowait((step, viewport))
 
-        # Wait for data to load and initial draw
-        await page.wait_for_timeout(2000)
+    async def worker(browser) -> None:
+        # One isolated browser context per worker; pages inside it are captured one at a time.
+        context = await browser.new_context()
+        try:
+            while not jobs.empty():
+                step, viewport = jobs.get_nowait()
+                print(await capture(context, base_url, step, viewport, timeout_ms), flush=True)
+        finally:
+            await context.close()
 
-        for step in range(8):
-            # Evaluate JS to set the step.
-            await page.evaluate(f"setStep({step})")
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            try:
+                await asyncio.gather(*(worker(browser) for _ in range(min(contexts, jobs.qsize()))))
+            finally:
+                await browser.close()
+    finally:
+        server.shutdown()
+        server.server_close()
 
-            # Wait for animation to finish. The animation duration is 720ms.
-            await page.wait_for_timeout(1000)
 
-            # Take screenshot
-            filename = f"conceptual_flat_earth_model_audit/screenshot_step_{step}.png"
-            await page.screenshot(path=filename)
-            print(f"Saved {filename}")
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--steps", type=int, nargs="*", default=list(range(STEP_COUNT)), help="steps to capture (default: all)")
+    p.add_argument("--viewport", type=parse_viewport, action="append",
+                   help=f"WIDTHxHEIGHT, repeatable (default: {DEFAULT_VIEWPORT[0]}x{DEFAULT_VIEWPORT[1]})")
+    p.add_argument("--contexts", type=int, default=min(4, os.cpu_count() or 1), help="browser contexts capturing in parallel")
+    p.add_argument("--timeout-ms", type=float, default=15_000, help="give up on a step that never signals it rendered")
+    args = p.parse_args()
+    asyncio.run(run(args.steps, args.viewport or [DEFAULT_VIEWPORT], args.contexts, args.timeout_ms))
 
-        await browser.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()